@@ -8,6 +8,10 @@ from django.urls import path
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 
+from bookings.models import sync_booking_usernames
+
+from .forms import AdminLoginForm
+
 # Custom UserAdmin
 class CustomUserAdmin(DefaultUserAdmin):
 
@@ -21,6 +25,12 @@ class CustomUserAdmin(DefaultUserAdmin):
         ]
         return custom_urls + urls
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Bookings keep a copy of the username for their listings
+        if change and 'username' in form.changed_data:
+            sync_booking_usernames(obj)
+
     def delete_user_link(self, obj):
         return f'<a class="button" href="/admin/accounts/customuser/delete-user/{obj.id}/">Delete</a>'
     delete_user_link.allow_tags = True
@@ -33,6 +43,9 @@ class CustomUserAdmin(DefaultUserAdmin):
         messages.success(request, f'User "{username}" deleted successfully.')
         return redirect('/admin/auth/user/')
 
+# Failed /admin/ logins count towards the same throttle as the site login
+admin.site.login_form = AdminLoginForm
+
 # Unregister default User admin and register custom one
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
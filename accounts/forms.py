@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.contrib.admin.forms import AdminAuthenticationForm
 from django.contrib.auth.forms import AuthenticationForm
 
+from .throttle import ThrottledLoginMixin
+
 class SignUpForm(forms.ModelForm):
     password = forms.CharField(
         widget=forms.PasswordInput(attrs={'placeholder': 'Password'})
@@ -23,11 +26,15 @@ class SignUpForm(forms.ModelForm):
             self.add_error('confirm_password', "Passwords do not match.")
         return cleaned_data
 
-class LoginForm(AuthenticationForm):
+class LoginForm(ThrottledLoginMixin, AuthenticationForm):
     username = forms.CharField(widget=forms.TextInput(attrs={'placeholder': 'Username'}))
     password = forms.CharField(widget=forms.PasswordInput(attrs={'placeholder': 'Password'}))
 
 
+class AdminLoginForm(ThrottledLoginMixin, AdminAuthenticationForm):
+    """The /admin/ login, under the same failed-attempt throttle."""
+
+
 
 class EditProfileForm(forms.ModelForm):
     display_name = forms.CharField(max_length=150, required=True)
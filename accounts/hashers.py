@@ -0,0 +1,28 @@
+"""
+Password hashers tuned from settings (PASSWORD_ARGON2, PASSWORD_SCRYPT).
+
+They keep Django's algorithm names, so stored hashes stay standard. Django
+rehashes a password on the next successful login when its stored parameters
+differ from these, so raising a cost needs no migration.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class StudioArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with time_cost, memory_cost (KiB) and parallelism from PASSWORD_ARGON2."""
+
+    def __init__(self):
+        for name, value in getattr(settings, 'PASSWORD_ARGON2', {}).items():
+            setattr(self, name, value)
+
+
+class StudioScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with work_factor, block_size and parallelism from PASSWORD_SCRYPT."""
+
+    def __init__(self):
+        for name, value in getattr(settings, 'PASSWORD_SCRYPT', {}).items():
+            setattr(self, name, value)
+        # hashlib refuses anything over 32 MiB unless told otherwise; scrypt needs 128 * N * r bytes
+        self.maxmem = 2 * 128 * self.work_factor * self.block_size
@@ -0,0 +1,126 @@
+"""
+Responsive image variants for the marketing pages.
+
+`manage.py build_images` resizes every picture under RESPONSIVE_IMAGE_SOURCE
+into several widths and formats, names each file after a hash of the source
+bytes and records the result in a JSON manifest. The {% responsive_image %}
+tag reads that manifest to emit <picture>/srcset markup; images that have not
+been built fall back to a plain <img>.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+
+FORMATS = {
+    # format: (extension, Pillow save options)
+    'avif': ('avif', {'quality': 55}),
+    'webp': ('webp', {'quality': 78, 'method': 6}),
+    'jpeg': ('jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+    'png': ('png', {'optimize': True}),
+}
+SOURCE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+MANIFEST_NAME = 'manifest.json'
+
+
+def output_root():
+    return Path(settings.RESPONSIVE_IMAGE_ROOT)
+
+
+def manifest_path():
+    return output_root() / MANIFEST_NAME
+
+
+@lru_cache(maxsize=1)
+def load_manifest():
+    try:
+        return json.loads(manifest_path().read_text())
+    except FileNotFoundError:
+        return {}
+
+
+# --------------------
+# BUILD
+# --------------------
+def supported_formats():
+    from PIL import features
+
+    formats = ['webp', 'jpeg', 'png']
+    if features.check('avif'):
+        formats.insert(0, 'avif')
+    return formats
+
+
+def target_widths(original_width):
+    widths = [width for width in settings.RESPONSIVE_IMAGE_WIDTHS if width < original_width]
+    widths.append(min(original_width, max(settings.RESPONSIVE_IMAGE_WIDTHS)))
+    return sorted(set(widths))
+
+
+def build_image(source, static_name, force=False):
+    """Write every variant of one source image and return its manifest entry."""
+    from PIL import Image, ImageOps
+
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()[:12]
+    prefix = Path(static_name).stem
+    static_prefix = Path(settings.RESPONSIVE_IMAGE_ROOT).name
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGBA')
+        # Many "photos" here carry an alpha channel that is fully opaque; drop it
+        has_alpha = image.getchannel('A').getextrema()[0] < 255
+        if not has_alpha:
+            image = image.convert('RGB')
+        # Transparent sources keep a PNG fallback; everything else falls back to JPEG
+        fallback = 'png' if has_alpha else 'jpeg'
+        formats = [fmt for fmt in supported_formats() if fmt in ('avif', 'webp', fallback)]
+
+        entry = {
+            'hash': digest,
+            'width': image.width,
+            'height': image.height,
+            'fallback': fallback,
+            'variants': {fmt: [] for fmt in formats},
+        }
+        for width in target_widths(image.width):
+            height = round(image.height * width / image.width)
+            resized = None
+            for fmt in formats:
+                extension, options = FORMATS[fmt]
+                filename = f"{prefix}.{digest}-{width}w.{extension}"
+                target = output_root() / filename
+                if force or not target.exists():
+                    if resized is None:
+                        resized = image.resize((width, height), Image.LANCZOS)
+                    resized.save(target, format=fmt.upper(), **options)
+                entry['variants'][fmt].append([width, f"{static_prefix}/{filename}"])
+    return entry
+
+
+def build_all(force=False, log=print):
+    """Build variants for every source image, drop stale files and rewrite the manifest."""
+    source_root = Path(settings.RESPONSIVE_IMAGE_SOURCE)
+    static_base = source_root.parent
+    output_root().mkdir(parents=True, exist_ok=True)
+
+    manifest = {}
+    for source in sorted(source_root.iterdir()):
+        if source.suffix.lower() not in SOURCE_SUFFIXES:
+            continue
+        static_name = source.relative_to(static_base).as_posix()
+        manifest[static_name] = build_image(source, static_name, force=force)
+        log(f"{static_name}: {source.stat().st_size // 1024} KB -> "
+            f"{sum(len(v) for v in manifest[static_name]['variants'].values())} variants")
+
+    keep = {Path(path).name for entry in manifest.values() for variants in entry['variants'].values() for _w, path in variants}
+    for existing in output_root().iterdir():
+        if existing.name not in keep and existing.name != MANIFEST_NAME:
+            existing.unlink()
+
+    manifest_path().write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    load_manifest.cache_clear()
+    return manifest
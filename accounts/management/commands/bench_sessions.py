@@ -0,0 +1,64 @@
+import json
+from itertools import product
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from photography_studio.loadtest import StudioBenchmark, seed_studio
+
+
+SCENARIOS = ('my_bookings', 'admin_dashboard')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare session engines with and without the cached auth user: queries and "
+        "latency per page view for My Bookings and the admin dashboard, as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=50, help="Requests per page and configuration.")
+        parser.add_argument('--engines', default='db,cached_db,signed_cookies',
+                            help="Comma-separated subset of: " + ', '.join(settings.SESSION_ENGINES))
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        engines = [name.strip() for name in options['engines'].split(',') if name.strip()]
+
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = str(connection.settings_dict['NAME']) + '.bench'
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed_studio(options['users'], options['bookings'])
+            benchmark = StudioBenchmark()
+            results = {}
+            for engine, user_cache in product(engines, (False, True)):
+                cache.clear()
+                with override_settings(
+                    SESSION_ENGINE=settings.SESSION_ENGINES[engine],
+                    AUTH_USER_CACHE_TIMEOUT=300 if user_cache else 0,
+                ):
+                    label = f"{engine}{'+user_cache' if user_cache else ''}"
+                    results[label] = benchmark.run(SCENARIOS, options['iterations'])
+            report = {
+                'vendor': connection.vendor,
+                'iterations': options['iterations'],
+                'configurations': results,
+            }
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from photography_studio.loadtest import SCENARIOS, StudioBenchmark, seed_studio
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and drive the real URL routes in-process, "
+        "reporting throughput, latency percentiles and query counts per scenario as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=50, help="Requests per scenario.")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of: " + ', '.join(SCENARIOS))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        if connection.vendor == 'sqlite':
+            # Measure the on-disk database rather than the in-memory test default
+            connection.settings_dict['TEST']['NAME'] = str(connection.settings_dict['NAME']) + '.bench'
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seeded = seed_studio(options['users'], options['bookings'], seed=options['seed'])
+            benchmark = StudioBenchmark(seed=options['seed'])
+            report = {
+                'vendor': connection.vendor,
+                'users': seeded['users'],
+                'bookings': seeded['bookings'],
+                'iterations': options['iterations'],
+                'scenarios': benchmark.run(scenarios, options['iterations']),
+            }
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
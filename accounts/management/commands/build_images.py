@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import build_all
+
+
+class Command(BaseCommand):
+    help = "Generate resized, hashed AVIF/WebP/JPEG variants of the site images for {% responsive_image %}."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-encode variants that already exist.")
+
+    def handle(self, *args, **options):
+        manifest = build_all(force=options['force'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {len(manifest)} images."))
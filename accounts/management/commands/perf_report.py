@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from photography_studio.perf import collect_report, reset_snapshots
+
+
+class Command(BaseCommand):
+    help = "Print per-view latency and query percentiles collected by PerfMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Emit the raw report as JSON.")
+        parser.add_argument('--reset', action='store_true', help="Delete the collected snapshots and start over.")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_snapshots()
+            self.stdout.write("Snapshots cleared; running workers start over on their next flush.")
+            return
+        report = collect_report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if not report:
+            self.stdout.write("No requests recorded. Is DJANGO_PERF_PROFILING=1 set on the web workers?")
+            return
+
+        header = f"{'view':<32}{'reqs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'sql p95':>9}{'dup p95':>9}{'tpl p95':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in report:
+            self.stdout.write(
+                f"{row['view'][:31]:<32}{row['requests']:>7}"
+                f"{row['wall_ms']['p50']:>10}{row['wall_ms']['p95']:>10}{row['wall_ms']['p99']:>10}"
+                f"{row['sql_count']['p95']:>9}{row['duplicate_sql']['p95']:>9}{row['template_ms']['p95']:>9}"
+            )
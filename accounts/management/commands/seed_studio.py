@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from photography_studio.loadtest import SEED_PASSWORD, seed_studio
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert synthetic clients, profiles and bookings for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--bookings', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+
+    def handle(self, *args, **options):
+        result = seed_studio(options['users'], options['bookings'], seed=options['seed'])
+        self.stdout.write(json.dumps(result, indent=2))
+        self.stdout.write(f"Seeded clients log in with the password {SEED_PASSWORD!r}.")
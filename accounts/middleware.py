@@ -0,0 +1,67 @@
+"""
+Authentication with a cached user lookup.
+
+Django's AuthenticationMiddleware loads request.user from the database on
+every request. This subclass keeps the user in the cache for
+AUTH_USER_CACHE_TIMEOUT seconds (0 turns caching off) and still checks the
+session's auth hash. accounts.models drops the cached copy whenever the user
+is saved or deleted (a password change, deactivation or deletion). That
+eviction only reaches every worker through a shared cache, so settings
+refuse a non-zero timeout on a per-process cache with several workers.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def auth_user_cache_key(user_id):
+    return f'studio:auth-user:{user_id}'
+
+
+def _session_hash_matches(request, user):
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    return bool(session_hash) and constant_time_compare(session_hash, user.get_session_auth_hash())
+
+
+def get_cached_user(request):
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if not timeout or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = auth_user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        # Full lookup, including the session hash check and session flush on mismatch
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, timeout)
+        return user
+
+    if not _session_hash_matches(request, user):
+        request.session.flush()
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: self._user(request))
+
+    @staticmethod
+    def _user(request):
+        if not hasattr(request, '_cached_user'):
+            request._cached_user = get_cached_user(request)
+        return request._cached_user
@@ -0,0 +1,42 @@
+# Indexes on auth_user for the staff user directory. auth.User belongs to
+# django.contrib.auth, so they are created with SQL rather than Meta.indexes.
+
+from django.db import migrations
+
+
+# (name, PostgreSQL definition, SQLite definition)
+INDEXES = (
+    # Keyset pagination, newest first
+    ('accounts_user_joined_idx', '(date_joined, id)', '(date_joined, id)'),
+    # Prefix search: trigram GIN on PostgreSQL, plain B-tree ranges on SQLite
+    # (username already has the B-tree behind its unique constraint)
+    ('accounts_user_username_trgm', 'USING gin (username gin_trgm_ops)', None),
+    ('accounts_user_email_idx', 'USING gin (email gin_trgm_ops)', '(email)'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    if postgres:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, pg_definition, sqlite_definition in INDEXES:
+        definition = pg_definition if postgres else sqlite_definition
+        if definition:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON auth_user {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    for name, _pg_definition, _sqlite_definition in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_deleteduser'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
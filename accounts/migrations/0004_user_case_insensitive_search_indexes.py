@@ -0,0 +1,55 @@
+# Case-insensitive prefix search (photography_studio/search.py) filters on an
+# expression of the column, so its indexes are built on that same expression.
+
+from django.db import migrations
+
+
+# (name, PostgreSQL definition, SQLite definition)
+INDEXES = (
+    # Matches Django's istartswith: UPPER(col::text) LIKE UPPER('term%')
+    ('accounts_user_username_upper_trgm', 'USING gin ((UPPER(username::text)) gin_trgm_ops)', None),
+    ('accounts_user_email_upper_trgm', 'USING gin ((UPPER(email::text)) gin_trgm_ops)', None),
+    # lower(col) >= 'term' AND lower(col) < next('term')
+    ('accounts_user_username_lower_idx', None, '(lower(username))'),
+    ('accounts_user_email_lower_idx', None, '(lower(email))'),
+)
+
+# Built by 0003 for case-sensitive search and no longer used: (name, PostgreSQL, SQLite)
+REPLACED = (
+    ('accounts_user_username_trgm', 'USING gin (username gin_trgm_ops)', None),
+    ('accounts_user_email_idx', 'USING gin (email gin_trgm_ops)', '(email)'),
+)
+
+
+def _create(schema_editor, indexes):
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for name, pg_definition, sqlite_definition in indexes:
+        definition = pg_definition if postgres else sqlite_definition
+        if definition:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON auth_user {definition}')
+
+
+def _drop(schema_editor, indexes):
+    for name, _pg_definition, _sqlite_definition in indexes:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def create_indexes(apps, schema_editor):
+    _create(schema_editor, INDEXES)
+    _drop(schema_editor, REPLACED)
+
+
+def restore_indexes(apps, schema_editor):
+    _create(schema_editor, REPLACED)
+    _drop(schema_editor, INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, restore_indexes),
+    ]
@@ -1,8 +1,14 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from accounts.middleware import auth_user_cache_key
+from accounts.throttle import clear_failures, record_failure
+from photography_studio.cache import bump_version
+
 
 # -----------------------------
 # USER PROFILE EXTENSION
@@ -39,3 +45,40 @@ class DeletedUser(models.Model):
 
     def __str__(self):
         return f"{self.username} (deleted by {self.deleted_by})"
+
+
+# -----------------------------
+# CACHE INVALIDATION
+# -----------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=DeletedUser)
+def invalidate_user_caches(sender, update_fields=None, raw=False, **kwargs):
+    # Logging in only touches last_login (and password, when it is rehashed),
+    # which no cached panel shows
+    if raw or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+    bump_version('users')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_auth_user(sender, instance, raw=False, **kwargs):
+    # Drop it now and again after commit, so a request racing the transaction
+    # cannot leave the old row cached
+    key = auth_user_cache_key(instance.pk)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# -----------------------------
+# LOGIN THROTTLE
+# -----------------------------
+@receiver(user_login_failed)
+def count_failed_login(sender, credentials, request=None, **kwargs):
+    record_failure(request, credentials.get('username'))
+
+
+@receiver(user_logged_in)
+def reset_failed_logins(sender, request, user, **kwargs):
+    clear_failures(user.get_username())
@@ -0,0 +1,53 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from accounts.images import FORMATS, load_manifest
+
+register = template.Library()
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+
+def _srcset(variants):
+    return ', '.join(f"{static(path)} {width}w" for width, path in variants)
+
+
+@register.simple_tag
+def responsive_image(path, alt='', sizes='100vw', loading='lazy', **attrs):
+    """
+    Render a static image as <picture> with AVIF/WebP sources and a srcset fallback.
+
+        {% responsive_image 'images/portrait.jpg' alt='Portrait' sizes='(max-width: 600px) 100vw, 33vw' %}
+
+    Extra keyword arguments become attributes of the <img>. Images missing from
+    the build manifest render as a plain <img>.
+    """
+    img_attrs = {'alt': alt, 'loading': loading, 'decoding': 'async', **attrs}
+    entry = load_manifest().get(path)
+    if entry is None:
+        return format_html(
+            '<img src="{}"{}>', static(path),
+            format_html_join('', ' {}="{}"', img_attrs.items()),
+        )
+
+    fallback = entry['fallback']
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (MIME_TYPES[fmt], _srcset(variants), sizes)
+            for fmt, variants in entry['variants'].items()
+            if fmt != fallback and fmt in FORMATS
+        ),
+    )
+    fallback_variants = entry['variants'][fallback]
+    img_attrs.update({
+        'srcset': _srcset(fallback_variants),
+        'sizes': sizes,
+        'width': entry['width'],
+        'height': entry['height'],
+    })
+    return format_html(
+        '<picture>{}<img src="{}"{}></picture>', sources, static(fallback_variants[-1][1]),
+        format_html_join('', ' {}="{}"', img_attrs.items()),
+    )
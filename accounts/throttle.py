@@ -0,0 +1,88 @@
+"""
+Failed-login throttle.
+
+Failures are counted in the cache per username and per client address. Once
+either count reaches its LOGIN_THROTTLE limit, ThrottledLoginMixin refuses the
+next attempts without calling authenticate(), so no password gets hashed.
+Counts expire `window` seconds after the first failure. A successful login
+clears the username's count, but not the address's, which may be shared.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+
+DEFAULT_LIMITS = {'per_username': 5, 'per_ip': 50, 'window': 15 * 60}
+THROTTLED_MESSAGE = "Too many failed login attempts. Please wait a few minutes and try again."
+
+
+def _limits():
+    return {**DEFAULT_LIMITS, **getattr(settings, 'LOGIN_THROTTLE', {})}
+
+
+def lockout_window():
+    """Seconds a locked-out client may have to wait (sent as Retry-After)."""
+    return _limits()['window']
+
+
+def client_address(request):
+    """The client's IP, read from X-Forwarded-For when NUM_PROXIES proxies sit in front of us."""
+    proxies = getattr(settings, 'NUM_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _username_key(username):
+    # Hashed: usernames are arbitrary text and some cache backends restrict key characters
+    digest = hashlib.sha256((username or '').lower().encode()).hexdigest()[:32]
+    return f'studio:login-fail:user:{digest}'
+
+
+def _counters(request, username):
+    """{cache key: limit} for this attempt."""
+    limits = _limits()
+    counters = {_username_key(username): limits['per_username']}
+    if request is not None:
+        counters[f'studio:login-fail:ip:{client_address(request)}'] = limits['per_ip']
+    return counters
+
+
+def is_locked_out(request, username):
+    counters = _counters(request, username)
+    counts = cache.get_many(list(counters))
+    return any(counts.get(key, 0) >= limit for key, limit in counters.items())
+
+
+def record_failure(request, username):
+    window = lockout_window()
+    for key in _counters(request, username):
+        if cache.add(key, 1, window):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, window)
+
+
+def clear_failures(username):
+    cache.delete(_username_key(username))
+
+
+class ThrottledLoginMixin:
+    """For AuthenticationForm subclasses: refuse locked-out attempts before authenticating."""
+
+    def clean(self):
+        if is_locked_out(self.request, self.cleaned_data.get('username')):
+            raise ValidationError(THROTTLED_MESSAGE, code='throttled')
+        return super().clean()
+
+    @property
+    def throttled(self):
+        return self.has_error('__all__', 'throttled')
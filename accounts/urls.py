@@ -16,6 +16,9 @@ urlpatterns = [
 
     # Admin Dashboard
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/panels/<slug:panel>/', views.admin_dashboard_panel, name='admin_dashboard_panel'),
+    path('admin-dashboard/users/', views.user_directory, name='user_directory'),
+    path('admin-dashboard/perf/', views.perf_report, name='perf_report'),
     path('admin/cancel-booking/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
 
     # FIX: Move delete user OUT of "admin/"
@@ -1,13 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.utils.timezone import now
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.db import transaction
 
 from .forms import SignUpForm, LoginForm, EditProfileForm
-from bookings.models import Booking
+from .models import DeletedUser
+from .throttle import lockout_window
+from bookings.models import LISTING_FIELDS, ArchivedBooking, Booking, BookingStats, Notification, sync_booking_usernames
+from bookings.pagination import filter_bookings, keyset_page, page_querystring
+from bookings.stats import abooking_counts, booking_counts
+from photography_studio.asyncviews import async_login_required
+from photography_studio.cache import FRAGMENT_TIMEOUT, cache_anonymous_page, get_versions
+from photography_studio.perf import collect_report, reset_snapshots
+from photography_studio.search import prefix_search
 
 # -------------------- HELPER DECORATORS --------------------
 def admin_required(view_func):
@@ -19,10 +32,12 @@ def admin_required(view_func):
     return wrapper
 
 # -------------------- HOME --------------------
+@cache_anonymous_page()
 def home_view(request):
     return render(request, "accounts/home.html")
 
 # -------------------- ABOUT --------------------
+@cache_anonymous_page()
 def about_view(request):
     return render(request, "about.html")
 
@@ -48,26 +63,27 @@ def signup_view(request):
 
 # -------------------- LOGIN --------------------
 def login_view(request):
+    throttled = False
     if request.method == 'POST':
         form = LoginForm(request, data=request.POST)
+        # is_valid() runs authenticate(), so the password is hashed exactly once
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-
-            if user is not None:
-                login(request, user)
-                if user.is_staff:
-                    return redirect('admin_dashboard')
-                next_url = request.GET.get('next')
-                return redirect(next_url if next_url else 'dashboard')
-            else:
-                messages.error(request, 'Invalid username or password')
+            user = form.get_user()
+            login(request, user)
+            if user.is_staff:
+                return redirect('admin_dashboard')
+            next_url = request.GET.get('next')
+            return redirect(next_url if next_url else 'dashboard')
+        throttled = form.throttled
     else:
         form = LoginForm()
         if 'next' in request.GET:
             messages.warning(request, 'You need to login first before booking.')
 
+    if throttled:
+        response = render(request, 'accounts/login.html', {'form': form, 'throttled': True}, status=429)
+        response['Retry-After'] = str(lockout_window())
+        return response
     return render(request, 'accounts/login.html', {'form': form})
 
 # -------------------- LOGOUT --------------------
@@ -77,22 +93,20 @@ def logout_view(request):
     return redirect('home')
 
 # -------------------- USER DASHBOARD --------------------
-@login_required
-def dashboard_view(request):
+@async_login_required
+async def dashboard_view(request):
     if request.user.is_staff:
         return redirect('admin_dashboard')
 
     user = request.user
-    next_booking = Booking.objects.filter(user=user, session_datetime__gte=now()).order_by('session_datetime').first()
-    total_booked = Booking.objects.filter(user=user).count()
-    pending_sessions = Booking.objects.filter(user=user, status__iexact="pending").count()
-    completed_sessions = Booking.objects.filter(user=user, status__iexact="approved").count()
+    next_booking = await Booking.objects.filter(user=user, session_datetime__gte=now()).order_by('session_datetime').afirst()
+    counts = await abooking_counts(user)
 
     context = {
         'next_booking': next_booking,
-        'total_booked': total_booked,
-        'pending_sessions': pending_sessions,
-        'completed_sessions': completed_sessions,
+        'total_booked': counts['total'],
+        'pending_sessions': counts['pending'],
+        'completed_sessions': counts['approved'],
     }
 
     return render(request, 'accounts/dashboard.html', context)
@@ -123,6 +137,7 @@ def edit_profile(request):
             messages.error(request, "Username is already taken!")
             return redirect('edit_profile')
 
+        old_username = user.username
         user.first_name = display_name
         user.username = username
         user.email = email
@@ -133,7 +148,10 @@ def edit_profile(request):
                 return redirect('edit_profile')
             user.set_password(password1)
 
-        user.save()
+        with transaction.atomic():
+            user.save()
+            if user.username != old_username:
+                sync_booking_usernames(user)
 
         profile = getattr(user, 'profile', None)
         if profile:
@@ -146,65 +164,167 @@ def edit_profile(request):
     return render(request, 'accounts/edit_profile.html')
 
 # -------------------- ADMIN DASHBOARD --------------------
+# The page itself is a shell: the summary counters (BookingStats plus a cached
+# user count) and one placeholder per panel. Each panel is fetched by the
+# browser from admin_dashboard_panel, so the slowest panel no longer holds
+# back the first paint and each one is cached on its own.
 @login_required
 @admin_required
 def admin_dashboard(request):
-
-    # -------- BOOKINGS --------
-    all_bookings = Booking.objects.all().order_by('-session_datetime')
-    total_bookings = all_bookings.count()
-    approved_bookings = all_bookings.filter(status='approved').count()
-    pending_bookings = all_bookings.filter(status='pending')
-    cancelled_bookings = all_bookings.filter(status='cancelled').count()
-
-    # -------- USERS --------
-    user_list = User.objects.all().order_by('-date_joined')
-    total_users = user_list.count()
-
-    # -------- DELETED USERS --------
-    from accounts.models import DeletedUser
-    deleted_users = DeletedUser.objects.all().order_by('-timestamp')
-
-    # -------- NOTIFICATIONS --------
-    notifications = []
-
-    for b in pending_bookings[:5]:
-        notifications.append(
-            {'message': f"{b.user.username} requested a {b.get_service_type_display()} session."}
-        )
-
-    cancelled_recent = all_bookings.filter(status='cancelled').order_by('-created_at')[:5]
-    for b in cancelled_recent:
-        notifications.append(
-            {'message': f"{b.user.username} cancelled their {b.get_service_type_display()} booking."}
-        )
-
-    # -------- ACTIVITY LOGS --------
-    activity_logs = [
-        {'timestamp': b.created_at, 'action': f"{b.user.username} booked {b.get_service_type_display()}"}
-        for b in all_bookings.order_by('-created_at')[:5]
-    ]
+    counts = booking_counts()
+    versions = get_versions()
+    total_users = cache.get_or_set(f"studio:user-count:{versions['users']}", User.objects.count, FRAGMENT_TIMEOUT)
 
     context = {
-        'all_bookings': all_bookings,
-        'total_bookings': total_bookings,
-        'approved_bookings': approved_bookings,
-        'pending_bookings': pending_bookings,
-        'cancelled_bookings': cancelled_bookings,
-
-        # FIXED — ADDED
-        'user_list': user_list,
+        # Passed on to the bookings panel (filters and pager cursors)
+        'query_string': request.GET.urlencode(),
+        'total_bookings': counts['total'],
+        'approved_bookings': counts['approved'],
+        'pending_count': counts['pending'],
+        'cancelled_bookings': counts['cancelled'],
         'total_users': total_users,
-        'deleted_users': deleted_users,
+    }
+    return render(request, 'accounts/dashboard_admin.html', context)
+
 
-        'notifications': notifications,
-        'activity_logs': activity_logs,
+def _bookings_panel(request):
+    # Table is keyset paginated on (session_datetime, id) so a page stays cheap
+    status_filter = request.GET.get('status', '')
+    service_filter = request.GET.get('service', '')
+    # ?history=1 pages through the archive instead (read-only rows)
+    show_history = request.GET.get('history') == '1'
+    listing = ArchivedBooking.objects.only(*LISTING_FIELDS) if show_history else Booking.objects.listing()
+    booking_page = keyset_page(
+        filter_bookings(listing, status_filter, service_filter),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    if booking_page['has_next']:
+        booking_page['next_url'] = page_querystring(request.GET, after=booking_page['next_cursor'])
+    if booking_page['has_previous']:
+        booking_page['previous_url'] = page_querystring(request.GET, before=booking_page['previous_cursor'])
+
+    # Pager, filters and the bulk form's return address all point at the shell page
+    dashboard_url = reverse('admin_dashboard')
+    return {
+        'booking_page': booking_page,
+        'show_history': show_history,
+        'status_filter': status_filter,
+        'service_filter': service_filter,
+        'status_choices': Booking.STATUS_CHOICES,
+        'service_choices': Booking.SERVICE_CHOICES,
+        'dashboard_url': dashboard_url,
+        'return_url': f"{dashboard_url}?{request.GET.urlencode()}" if request.GET else dashboard_url,
     }
 
-    return render(request, 'accounts/dashboard_admin.html', context)
 
+# Panels below hand the template callables: they only run when its fragment cache misses
+def _users_panel(request):
+    # The newest sign-ups only; everyone else is a search away in user_directory
+    return {'user_list': lambda: User.objects.order_by('-date_joined', '-id')[:USERS_PANEL_SIZE]}
+
+
+def _deleted_users_panel(request):
+    return {'deleted_users': lambda: DeletedUser.objects.order_by('-timestamp')}
+
+
+def _notifications_panel(request):
+    def notifications():
+        listing = Booking.objects.for_dashboard()
+        items = [
+            {'message': f"{b.username} requested a {b.get_service_type_display()} session."}
+            for b in listing.filter(status=Booking.Status.PENDING)[:5]
+        ]
+        cancelled_recent = listing.filter(status=Booking.Status.CANCELLED).order_by('-created_at')[:5]
+        items += [
+            {'message': f"{b.username} cancelled their {b.get_service_type_display()} booking."}
+            for b in cancelled_recent
+        ]
+        return items
+    return {'notifications': notifications}
+
+
+def _activity_panel(request):
+    def activity_logs():
+        return [
+            {'timestamp': b.created_at, 'action': f"{b.username} booked {b.get_service_type_display()}"}
+            for b in Booking.objects.only('username', 'service_type', 'created_at').order_by('-created_at')[:5]
+        ]
+    return {'activity_logs': activity_logs}
+
+
+def _calendar_panel(request):
+    # Events come from calendar_feed, per visible range, once the calendar renders
+    return {}
+
+
+# name: context builder; templates live in accounts/panels/<name>.html
+DASHBOARD_PANELS = {
+    'bookings': _bookings_panel,
+    'calendar': _calendar_panel,
+    'users': _users_panel,
+    'deleted_users': _deleted_users_panel,
+    'notifications': _notifications_panel,
+    'activity': _activity_panel,
+}
 
 
+@login_required
+@admin_required
+def admin_dashboard_panel(request, panel):
+    if panel not in DASHBOARD_PANELS:
+        raise Http404("No such dashboard panel.")
+    context = DASHBOARD_PANELS[panel](request)
+    context.update({'cache_versions': get_versions(), 'fragment_timeout': FRAGMENT_TIMEOUT})
+    response = render(request, f'accounts/panels/{panel}.html', context)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+
+# -------------------- ADMIN – USER DIRECTORY --------------------
+USERS_PANEL_SIZE = 10
+DIRECTORY_FIELDS = ('id', 'username', 'email', 'date_joined', 'is_staff')
+
+
+@login_required
+@admin_required
+def user_directory(request):
+    # Keyset pages on (date_joined, id); ?q= is a prefix of the username or email
+    query = request.GET.get('q', '').strip()
+    users = prefix_search(User.objects.only(*DIRECTORY_FIELDS), ('username', 'email'), query)
+    user_page = keyset_page(
+        users, request.GET.get('after'), request.GET.get('before'), field='date_joined',
+    )
+    if user_page['has_next']:
+        user_page['next_url'] = page_querystring(request.GET, after=user_page['next_cursor'])
+    if user_page['has_previous']:
+        user_page['previous_url'] = page_querystring(request.GET, before=user_page['previous_cursor'])
+
+    # Booking counts for the whole page from the BookingStats rows, in one query
+    stats = {
+        row['user_id']: row
+        for row in BookingStats.objects.filter(user_id__in=[u.pk for u in user_page['object_list']])
+        .values('user_id', 'total', 'pending', 'approved')
+    }
+    for u in user_page['object_list']:
+        u.counts = stats.get(u.pk, {'total': 0, 'pending': 0, 'approved': 0})
+
+    return render(request, 'accounts/user_directory.html', {'user_page': user_page, 'query': query})
+
+
+# -------------------- ADMIN – PERFORMANCE REPORT --------------------
+@login_required
+@admin_required
+def perf_report(request):
+    if request.method == 'POST':
+        reset_snapshots()
+        return redirect('perf_report')
+    report = collect_report()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'enabled': settings.PERF_PROFILING, 'views': report})
+    return render(request, 'accounts/perf_report.html', {'report': report, 'enabled': settings.PERF_PROFILING})
+
 
 
 
@@ -212,10 +332,13 @@ def admin_dashboard(request):
 @admin_required
 def cancel_booking(request, booking_id):
     booking = get_object_or_404(Booking, pk=booking_id)
-    if booking.status != 'cancelled':
-        booking.status = 'cancelled'
-        booking.save()
-        messages.info(request, f"{booking.user.username}'s booking has been cancelled.")  # purple/pink info
+    if booking.status != Booking.Status.CANCELLED:
+        booking.status = Booking.Status.CANCELLED
+        booking.notified = False
+        with transaction.atomic():
+            booking.save()
+            Notification.objects.notify(booking, 'cancelled')
+        messages.info(request, f"{booking.username}'s booking has been cancelled.")  # purple/pink info
     return redirect('admin_dashboard')
 
 
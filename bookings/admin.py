@@ -1,21 +1,74 @@
-from django.contrib import admin
-from .models import Booking
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from photography_studio.search import prefix_search
+
+from .availability import save_if_available
+from .forms import BookingAdminForm
+from .models import ArchivedBooking, Booking, Job
+from .moderation import moderate_bookings
 
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ('user', 'service_type', 'session_datetime', 'status')
+    form = BookingAdminForm
+    list_display = ('username', 'service_type', 'session_datetime', 'status')
     list_filter = ('status', 'service_type')
-    search_fields = ('user__username',)
+    search_fields = ('username',)
+    search_help_text = "Username prefix (any case)."
 
     actions = ['approve_bookings', 'disapprove_bookings']
 
+    def save_model(self, request, obj, form, change):
+        # Re-checked under the schedule lock; the form's check only gives a friendly error
+        if form.moves_schedule():
+            save_if_available(obj)
+        else:
+            super().save_model(request, obj, form, change)
+
+    def get_search_results(self, request, queryset, search_term):
+        # '%term%' on bookings.username reads the whole table; find the owners
+        # through the username index instead and filter on the user_id index
+        if not search_term.strip():
+            return queryset, False
+        owners = prefix_search(User.objects.all(), ('username',), search_term).values('pk')
+        return queryset.filter(user__in=owners), False
+
+    def _moderate(self, request, queryset, action, label):
+        try:
+            # Same path as the dashboard: resets `notified` and queues the clients' messages
+            updated = moderate_bookings(queryset.values_list('pk', flat=True), action)
+        except ValidationError as error:
+            self.message_user(request, "Nothing changed: " + "; ".join(error.messages), messages.ERROR)
+        else:
+            self.message_user(request, f"{updated} bookings {label}.")
+
     def approve_bookings(self, request, queryset):
-        updated = queryset.update(status='approved')
-        self.message_user(request, f"{updated} bookings approved successfully.")
+        self._moderate(request, queryset, 'approve', "approved successfully")
     approve_bookings.short_description = "Approve selected bookings"
 
     def disapprove_bookings(self, request, queryset):
-        updated = queryset.update(status='disapproved')
-        self.message_user(request, f"{updated} bookings disapproved.")
+        self._moderate(request, queryset, 'disapprove', "disapproved")
     disapprove_bookings.short_description = "Disapprove selected bookings"
 
 admin.site.register(Booking, BookingAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'locked_at', 'finished_at', 'last_error')
+
+admin.site.register(Job, JobAdmin)
+
+
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('username', 'service_type', 'session_datetime', 'status', 'archived_at')
+    list_filter = ('status', 'service_type')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+admin.site.register(ArchivedBooking, ArchivedBookingAdmin)
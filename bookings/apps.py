@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from photography_studio.db import tune_sqlite
+
+        connection_created.connect(tune_sqlite, dispatch_uid='tune_sqlite')
+
+        # Register the background job handlers
+        from . import tasks  # noqa: F401
@@ -0,0 +1,85 @@
+"""
+Moving old bookings out of the hot table (`manage.py archive_bookings`).
+
+Every view that lists bookings scans bookings_booking, so rows nobody acts on
+any more are copied into ArchivedBooking and deleted from it, one batched
+transaction at a time. The working set, and the indexes over it, then stay
+the size of the studio's live calendar. History is read back only where it
+is asked for (?history=1 on My Bookings, the dashboard table and the
+calendar feed; include_history on exports).
+"""
+
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from photography_studio.cache import bump_version
+
+from .models import ArchivedBooking, Booking, BookingStats, counted_in_bulk
+
+
+BATCH_SIZE = 1000
+CLOSED_STATUSES = (Booking.Status.CANCELLED, Booking.Status.DISAPPROVED)
+
+
+def archivable(older_than, closed_older_than=None, now=None):
+    """
+    Bookings whose session is more than `older_than` in the past, plus
+    cancelled and disapproved ones last changed more than `closed_older_than` ago.
+    """
+    now = now or timezone.now()
+    condition = Q(session_datetime__lt=now - older_than)
+    if closed_older_than is not None:
+        condition |= Q(status__in=CLOSED_STATUSES, updated_at__lt=now - closed_older_than)
+    return Booking.objects.filter(condition)
+
+
+def _archive_batch(bookings, batch_size):
+    """Move up to `batch_size` bookings in one transaction; returns how many moved."""
+    with transaction.atomic():
+        rows = list(
+            bookings.order_by('id').select_for_update().values_list(*ArchivedBooking.COPIED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+        ArchivedBooking.objects.bulk_create(
+            ArchivedBooking(**dict(zip(ArchivedBooking.COPIED_FIELDS, row))) for row in rows
+        )
+
+        # The whole batch's counter changes in one UPDATE per scope, as set_status() does
+        deltas = defaultdict(Counter)
+        for _id, user_id, _username, service_type, _when, status, *_rest in rows:
+            for scope in (None, user_id):
+                deltas[scope]['total'] -= 1
+                deltas[scope][status] -= 1
+                deltas[scope][service_type] -= 1
+        for scope, delta in deltas.items():
+            BookingStats.objects.apply(scope, delta, create=False)
+
+        # on_delete=SET_NULL still detaches the notifications; the per-row
+        # receivers stand down, and archive_bookings() bumps the version once
+        with counted_in_bulk():
+            Booking.objects.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archive_bookings(older_than=timedelta(days=365), closed_older_than=timedelta(days=30),
+                     batch_size=BATCH_SIZE, pause=0):
+    """Archive everything archivable() matches, `batch_size` rows per transaction; returns the count."""
+    bookings = archivable(older_than, closed_older_than)
+    moved = 0
+    while True:
+        count = _archive_batch(bookings, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    if moved:
+        bump_version('bookings')
+    return moved
@@ -0,0 +1,204 @@
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, BookingStats
+
+
+# --------------------
+# STUDIO RULES
+# --------------------
+SERVICE_DURATIONS = {
+    'portrait': timedelta(hours=1),
+    'wedding': timedelta(hours=6),
+    'product': timedelta(hours=2),
+    'event': timedelta(hours=4),
+}
+BUFFER = timedelta(minutes=30)          # setup / teardown between sessions
+STUDIO_OPENS = time(9, 0)
+STUDIO_CLOSES = time(18, 0)
+SLOT_STEP = timedelta(minutes=30)       # granularity of offered start times
+MAX_RANGE_DAYS = 31
+
+# Only these statuses hold a slot on the calendar
+BLOCKING_STATUSES = (Booking.Status.PENDING, Booking.Status.APPROVED)
+
+LONGEST_SESSION = max(SERVICE_DURATIONS.values())
+
+
+def session_end(service_type, start):
+    return start + SERVICE_DURATIONS[service_type]
+
+
+# --------------------
+# INTERVAL INDEX
+# --------------------
+class IntervalIndex:
+    """
+    Busy intervals sorted by start, answering overlap queries with a bisect.
+
+    A running maximum of the end times keeps the lookup exact even if older
+    rows overlap each other, so a check is O(log n) after the O(n log n) build.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals)
+        self._starts = [start for start, _end in self.intervals]
+        self._max_ends = list(accumulate((end for _start, end in self.intervals), max))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlaps(self, start, end):
+        # Every interval starting before `end` is a candidate; the furthest-reaching decides
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._max_ends[i - 1] > start
+
+    @classmethod
+    def for_window(cls, start, end, exclude_pk=None, exclude_pks=()):
+        """Load the blocking sessions that could touch [start, end) from the database."""
+        rows = Booking.objects.filter(
+            status__in=BLOCKING_STATUSES,
+            session_datetime__gt=start - LONGEST_SESSION - BUFFER,
+            session_datetime__lt=end + BUFFER,
+        )
+        if exclude_pk is not None:
+            rows = rows.exclude(pk=exclude_pk)
+        if exclude_pks:
+            rows = rows.exclude(pk__in=exclude_pks)
+        return cls(
+            (session_start - BUFFER, session_end(service_type, session_start) + BUFFER)
+            for session_start, service_type in rows.values_list('session_datetime', 'service_type')
+        )
+
+
+# --------------------
+# VALIDATION
+# --------------------
+def within_studio_hours(start, end):
+    local_start, local_end = timezone.localtime(start), timezone.localtime(end)
+    return (
+        local_start.date() == local_end.date()
+        and local_start.time() >= STUDIO_OPENS
+        and local_end.time() <= STUDIO_CLOSES
+    )
+
+
+def check_available(booking):
+    """
+    Raise ValidationError if `booking` falls outside studio hours or overlaps another session.
+
+    Only what the edit changes is checked against the stored row: a booking
+    that keeps its time and service is never held to today's studio hours, so
+    legacy sessions stay editable, and it is only checked for overlaps when
+    it starts blocking the calendar.
+    """
+    if booking.status not in BLOCKING_STATUSES:
+        return
+    start = booking.session_datetime
+    end = session_end(booking.service_type, start)
+    stored = None
+    if booking.pk is not None:
+        stored = Booking.objects.filter(pk=booking.pk).values_list('session_datetime', 'service_type', 'status').first()
+    moved = stored is None or stored[:2] != (start, booking.service_type)
+    if not moved and stored[2] in BLOCKING_STATUSES:
+        return
+    if moved and not within_studio_hours(start, end):
+        raise ValidationError(
+            f"Sessions must start and end within studio hours "
+            f"({STUDIO_OPENS:%H:%M}–{STUDIO_CLOSES:%H:%M})."
+        )
+    if IntervalIndex.for_window(start, end, exclude_pk=booking.pk).overlaps(start, end):
+        raise ValidationError("That time overlaps another session. Please pick another slot.")
+
+
+def check_batch_available(sessions):
+    """
+    Validate a set of bookings moving together, given as (pk, service_type, new_start).
+
+    Returns {pk: error message}; the moving bookings are checked against the
+    rest of the calendar and against each other.
+    """
+    if not sessions:
+        return {}
+    intervals = {
+        pk: (start, session_end(service_type, start))
+        for pk, service_type, start in sessions
+    }
+    others = IntervalIndex.for_window(
+        min(start for start, _end in intervals.values()),
+        max(end for _start, end in intervals.values()),
+        exclude_pks=list(intervals),
+    )
+    errors, reach = {}, None
+    for pk, (start, end) in sorted(intervals.items(), key=lambda item: item[1]):
+        if not within_studio_hours(start, end):
+            errors[pk] = "outside studio hours"
+        elif others.overlaps(start, end) or (reach is not None and reach > start):
+            errors[pk] = "overlaps another session"
+        # Sorted by start, so the furthest-reaching earlier session is the only one to beat
+        reach = end + BUFFER if reach is None else max(reach, end + BUFFER)
+    return errors
+
+
+def lock_schedule():
+    """
+    Serialize booking writes for the rest of the current transaction.
+
+    The studio-wide BookingStats row acts as the schedule lock: SELECT ... FOR
+    UPDATE where supported, otherwise a no-op UPDATE so SQLite takes its write
+    lock before the conflict check instead of at insert time.
+    """
+    rows = BookingStats.objects.filter(user__isnull=True)
+    if connection.features.has_select_for_update:
+        locked = list(rows.select_for_update())
+    else:
+        locked = rows.update(total=F('total'))
+    if not locked:
+        # Empty studio: create the row, then lock it
+        BookingStats.objects.get_or_create(user=None)
+        lock_schedule()
+
+
+def save_if_available(booking):
+    """Check for conflicts and save in one locked transaction."""
+    with transaction.atomic():
+        lock_schedule()
+        check_available(booking)
+        booking.save()
+
+
+# --------------------
+# FREE SLOTS
+# --------------------
+def free_slots(service_type, first_day, last_day):
+    """
+    Bookable (start, end) pairs for `service_type` between two dates, inclusive.
+
+    One range query loads the busy sessions; each candidate start is then
+    checked against the interval index.
+    """
+    duration = SERVICE_DURATIONS[service_type]
+    tz = timezone.get_current_timezone()
+    window_start = timezone.make_aware(datetime.combine(first_day, STUDIO_OPENS), tz)
+    window_end = timezone.make_aware(datetime.combine(last_day, STUDIO_CLOSES), tz)
+    busy = IntervalIndex.for_window(window_start, window_end)
+    earliest = timezone.now()
+
+    slots = []
+    day = first_day
+    while day <= last_day:
+        start = timezone.make_aware(datetime.combine(day, STUDIO_OPENS), tz)
+        closing = timezone.make_aware(datetime.combine(day, STUDIO_CLOSES), tz)
+        while start + duration <= closing:
+            end = start + duration
+            if start >= earliest and not busy.overlaps(start, end):
+                slots.append((start, end))
+            start += SLOT_STEP
+        day += timedelta(days=1)
+    return slots
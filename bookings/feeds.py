@@ -0,0 +1,155 @@
+import hashlib
+import json
+from datetime import datetime, time
+
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from photography_studio.cache import get_versions
+
+from .availability import session_end
+from .models import ArchivedBooking, Booking
+
+
+MAX_WINDOW_DAYS = 100
+CHUNK_SIZE = 500
+
+VERSION_AGGREGATES = {'count': Count('id'), 'changed': Max('updated_at'), 'newest': Max('id')}
+
+EVENT_CLASSES = {
+    Booking.Status.PENDING: 'event-pending',
+    Booking.Status.APPROVED: 'event-approved',
+    Booking.Status.DISAPPROVED: 'event-denied',
+    Booking.Status.CANCELLED: 'event-cancelled',
+}
+ARCHIVED_CLASS = 'event-archived'
+
+
+# --------------------
+# WINDOW PARAMETERS
+# --------------------
+def parse_window_bound(value):
+    """Accept FullCalendar's ISO datetimes as well as plain dates."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def wants_history(request):
+    """Archived sessions are only added to the feed for ?history=1."""
+    return request.GET.get('history') == '1'
+
+
+def window_bookings(start, end, model=Booking):
+    # Served by the (session_datetime, id) index of either table
+    return model.objects.filter(session_datetime__gte=start, session_datetime__lt=end)
+
+
+# --------------------
+# CONDITIONAL GET
+# --------------------
+def window_version(request):
+    """
+    Count, newest change and highest id of the bookings in the requested window.
+
+    Any insert, edit or delete inside the window changes at least one of them.
+    Memoised on the request because ETag and Last-Modified both need it.
+    """
+    if not hasattr(request, '_calendar_window_version'):
+        start = parse_window_bound(request.GET.get('start'))
+        end = parse_window_bound(request.GET.get('end'))
+        version = None
+        if start and end:
+            version = window_bookings(start, end).aggregate(**VERSION_AGGREGATES)
+        request._calendar_window_version = version
+    return request._calendar_window_version
+
+
+async def awindow_version(request):
+    """Async window_version(); fills the same memo, so calendar_etag() and friends reuse it."""
+    if not hasattr(request, '_calendar_window_version'):
+        start = parse_window_bound(request.GET.get('start'))
+        end = parse_window_bound(request.GET.get('end'))
+        version = None
+        if start and end:
+            version = await window_bookings(start, end).aaggregate(**VERSION_AGGREGATES)
+        request._calendar_window_version = version
+    return request._calendar_window_version
+
+
+def calendar_etag(request):
+    version = window_version(request)
+    if version is None:
+        return None
+    key = f"{request.GET.get('start')}|{request.GET.get('end')}|{version['count']}|{version['changed']}|{version['newest']}"
+    if wants_history(request):
+        # Archiving and renames bump the bookings version; archived rows never change otherwise
+        key += f"|history|{get_versions()['bookings']}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def calendar_last_modified(request):
+    version = window_version(request)
+    return version['changed'] if version else None
+
+
+# --------------------
+# EVENT STREAM
+# --------------------
+def _event_rows(start, end, model=Booking):
+    return (
+        window_bookings(start, end, model)
+        .order_by('session_datetime', 'id')
+        .values('id', 'service_type', 'session_datetime', 'status', 'username')
+    )
+
+
+def _event_json(row, archived=False):
+    return json.dumps({
+        'id': row['id'],
+        'title': row['service_type'],
+        'start': row['session_datetime'].isoformat(),
+        'end': session_end(row['service_type'], row['session_datetime']).isoformat(),
+        'user': row['username'],
+        'service': row['service_type'],
+        'status': row['status'],
+        # Archived sessions are read-only
+        'editUrl': None if archived else reverse('admin_update_booking', args=[row['id']]),
+        'classNames': [ARCHIVED_CLASS if archived else EVENT_CLASSES.get(row['status'], '')],
+    })
+
+
+def _sources(include_history):
+    return ((Booking, False), (ArchivedBooking, True)) if include_history else ((Booking, False),)
+
+
+def stream_events(start, end, include_history=False):
+    """Yield the window's bookings as a JSON array, one event at a time."""
+    yield '['
+    first = True
+    for model, archived in _sources(include_history):
+        for row in _event_rows(start, end, model).iterator(chunk_size=CHUNK_SIZE):
+            yield ('' if first else ',') + _event_json(row, archived)
+            first = False
+    yield ']'
+
+
+async def astream_events(start, end, include_history=False):
+    """stream_events() for the ASGI calendar feed; rows arrive in CHUNK_SIZE batches."""
+    yield '['
+    first = True
+    for model, archived in _sources(include_history):
+        async for row in _event_rows(start, end, model).aiterator(chunk_size=CHUNK_SIZE):
+            yield ('' if first else ',') + _event_json(row, archived)
+            first = False
+    yield ']'
@@ -1,4 +1,7 @@
 from django import forms
+from django.core.exceptions import ValidationError
+
+from .availability import check_available
 from .models import Booking
 
 class BookingForm(forms.ModelForm):
@@ -9,3 +12,26 @@ class BookingForm(forms.ModelForm):
             'session_datetime': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'notes': forms.Textarea(attrs={'rows': 3}),
         }
+
+
+class BookingAdminForm(forms.ModelForm):
+    """Django admin change form: moving a session gets the same clash check as the site."""
+
+    SCHEDULE_FIELDS = {'session_datetime', 'service_type', 'status'}
+
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def moves_schedule(self):
+        return self.instance._state.adding or bool(self.SCHEDULE_FIELDS & set(self.changed_data))
+
+    def _post_clean(self):
+        # The parent copies the cleaned values onto self.instance
+        super()._post_clean()
+        if any(self.has_error(field) for field in self.SCHEDULE_FIELDS) or not self.moves_schedule():
+            return
+        try:
+            check_available(self.instance)
+        except ValidationError as error:
+            self.add_error('session_datetime', error)
@@ -0,0 +1,249 @@
+"""
+Bulk booking import (staff upload and `manage.py import_bookings`).
+
+Files are read one line at a time, each row is validated on its own, and the
+good rows are inserted in batches, one transaction per batch. Usernames are
+resolved once per batch with a single IN query and remembered for the rest
+of the file.
+
+Each batch is one bulk_create(), which skips the Booking signals, so the
+batch adjusts BookingStats itself in the same transaction. Bad rows never
+stop the import; they are handed to `on_reject` with their line number and
+the reason. A file that is not UTF-8 is refused up front by check_encoding().
+
+Imported rows are history from the old system: they skip the clash check
+and client notifications, and are marked notified.
+"""
+
+import codecs
+import csv
+import json
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from photography_studio.cache import bump_version
+
+from .models import Booking, BookingStats
+
+
+BATCH_SIZE = 10000          # rows per transaction
+INSERT_BATCH_SIZE = 1000    # rows per INSERT statement (Django lowers it to fit SQLite's parameter limit)
+COLUMNS = ('username', 'service_type', 'session_datetime', 'status', 'notes')
+FORMATS = ('csv', 'ndjson')
+
+# Accept the stored codes as well as the labels the old spreadsheets used
+SERVICES = {
+    **{label.lower(): code for code, label in Booking.SERVICE_CHOICES},
+    **{code: code for code, _label in Booking.SERVICE_CHOICES},
+}
+STATUSES = {
+    **{label.lower(): code for code, label in Booking.STATUS_CHOICES},
+    **{code: code for code in Booking.Status.values},
+}
+
+
+# --------------------
+# READERS
+# --------------------
+def read_csv(lines):
+    """Yield (line number, record or None, error) for a CSV file with a header row."""
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames or ()
+    except csv.Error as error:
+        yield 1, None, f"Malformed CSV header: {error}"
+        return
+    missing = {'username', 'service_type', 'session_datetime'} - set(fieldnames)
+    if missing:
+        yield 1, None, f"Missing columns: {', '.join(sorted(missing))}."
+        return
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # The reader moves on to the next line, so only this row is lost
+            yield reader.line_num, None, f"Malformed CSV: {error}"
+            continue
+        yield reader.line_num, record, None
+
+
+def read_ndjson(lines):
+    """Yield (line number, record or None, error) for one JSON object per line."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Expected a JSON object."
+            continue
+        yield number, record, None
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def check_encoding(stream, encoding='utf-8-sig'):
+    """
+    Raise ValueError naming the first line of binary `stream` that is not
+    valid `encoding`, before anything is imported; rewinds the stream.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    number = 0
+    try:
+        for number, line in enumerate(stream, start=1):
+            decoder.decode(line)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ValueError(f"Line {number or 1} is not valid UTF-8; save the file as UTF-8 and try again.")
+    stream.seek(0)
+
+
+def guess_format(filename):
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+# --------------------
+# VALIDATION
+# --------------------
+def _text(record, name):
+    value = record.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def clean_record(record):
+    """Return the booking fields of one record (username still unresolved); raises ValueError."""
+    username = _text(record, 'username')
+    if not username:
+        raise ValueError("username is required.")
+
+    service = SERVICES.get(_text(record, 'service_type').lower())
+    if service is None:
+        raise ValueError(f"Unknown service {_text(record, 'service_type')!r}.")
+    status = STATUSES.get(_text(record, 'status').lower() or Booking.Status.PENDING)
+    if status is None:
+        raise ValueError(f"Unknown status {_text(record, 'status')!r}.")
+
+    raw_when = _text(record, 'session_datetime')
+    try:
+        when = parse_datetime(raw_when)
+    except ValueError:
+        when = None
+    if when is None:
+        raise ValueError(f"session_datetime {raw_when!r} is not a date and time (YYYY-MM-DD HH:MM).")
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+
+    return {
+        'username': username,
+        'service_type': service,
+        'status': status,
+        'session_datetime': when,
+        'notes': _text(record, 'notes') or None,
+    }
+
+
+# --------------------
+# IMPORT
+# --------------------
+class _UserLookup:
+    """username -> id, filled one IN query per batch and kept for the whole file."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, usernames):
+        unseen = set(usernames) - self.ids.keys()
+        if unseen:
+            found = dict(User.objects.filter(username__in=unseen).values_list('username', 'id'))
+            for username in unseen:
+                self.ids[username] = found.get(username)
+        return self.ids
+
+
+def _insert(rows):
+    """Insert one batch of cleaned rows (with user_id) and add it to BookingStats, atomically."""
+    bookings = [
+        Booking(
+            user_id=row['user_id'], username=row['username'], service_type=row['service_type'],
+            session_datetime=row['session_datetime'], status=row['status'], notes=row['notes'], notified=True,
+        )
+        for row in rows
+    ]
+    deltas = defaultdict(Counter)
+    for row in rows:
+        for scope in (None, row['user_id']):
+            deltas[scope]['total'] += 1
+            deltas[scope][row['status']] += 1
+            deltas[scope][row['service_type']] += 1
+    with transaction.atomic():
+        Booking.objects.bulk_create(bookings, batch_size=INSERT_BATCH_SIZE)
+        for scope, delta in deltas.items():
+            BookingStats.objects.apply(scope, delta)
+
+
+def import_bookings(records, batch_size=BATCH_SIZE, dry_run=False, on_reject=None):
+    """
+    Validate and insert (line number, record, error) triples from a reader.
+
+    Returns {'imported': n, 'rejected': n}. With `dry_run` everything is
+    validated, usernames included, but nothing is written.
+    """
+    users = _UserLookup()
+    summary = {'imported': 0, 'rejected': 0}
+
+    def reject(number, record, error):
+        summary['rejected'] += 1
+        if on_reject is not None:
+            on_reject(number, error, record)
+
+    def flush(pending):
+        ids = users.resolve(fields['username'] for _number, _record, fields in pending)
+        rows = []
+        for number, record, fields in pending:
+            fields['user_id'] = ids[fields['username']]
+            if fields['user_id'] is None:
+                reject(number, record, f"Unknown user {record.get('username')!r}.")
+                continue
+            rows.append(fields)
+        if rows and not dry_run:
+            _insert(rows)
+        summary['imported'] += len(rows)
+
+    pending = []
+    for number, record, error in records:
+        if error is None:
+            try:
+                pending.append((number, record, clean_record(record)))
+            except ValueError as invalid:
+                error = str(invalid)
+        if error is not None:
+            reject(number, record, error)
+        if len(pending) >= batch_size:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+
+    if summary['imported'] and not dry_run:
+        bump_version('bookings')
+    return summary
+
+
+def reject_writer(handle):
+    """on_reject callback writing a CSV reject report (line, error, original record) to `handle`."""
+    writer = csv.writer(handle)
+    writer.writerow(['line', 'error', 'record'])
+
+    def write(number, error, record):
+        writer.writerow([number, error, '' if record is None else json.dumps(record, default=str)])
+    return write
@@ -0,0 +1,140 @@
+"""
+Database-backed background jobs.
+
+Views enqueue a Job row inside their own transaction (Job.objects.enqueue),
+so the job exists if and only if the change that caused it committed.
+`manage.py run_workers` claims due jobs, with SELECT ... FOR UPDATE SKIP
+LOCKED where the database supports it so several workers never block on or
+double-claim the same rows, and retries failures with exponential backoff.
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+# A running job whose worker died is handed out again after this long
+LEASE = timedelta(minutes=10)
+
+
+def handler(name):
+    """Register the decorated function as the handler for jobs called `name`."""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts`: 30s, 1m, 2m, ... capped at an hour, with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+# --------------------
+# CLAIMING
+# --------------------
+def _abandoned(now):
+    # Running past its lease: the worker died (OOM, SIGKILL) without recording an outcome
+    return Q(status='running', locked_at__lt=now - LEASE)
+
+
+def _claimable(now):
+    return Job.objects.filter(
+        Q(status='queued', run_at__lte=now) | _abandoned(now) & Q(attempts__lt=F('max_attempts'))
+    ).order_by('run_at', 'id')
+
+
+def fail_exhausted(now):
+    """Fail abandoned jobs that have used up their attempts, rather than hand them out forever."""
+    return Job.objects.filter(_abandoned(now), attempts__gte=F('max_attempts')).update(
+        status='failed', locked_at=None, finished_at=now,
+        last_error=f"Worker stopped responding; lease of {LEASE} expired on the final attempt.",
+    )
+
+
+def claim(batch_size=10):
+    """Mark up to `batch_size` due jobs as running and return them."""
+    now = timezone.now()
+    fail_exhausted(now)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(_claimable(now).select_for_update(skip_locked=True)[:batch_size])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running', locked_at=now, attempts=F('attempts') + 1,
+            )
+    else:
+        # SQLite: no row locks. Take jobs one conditional UPDATE at a time;
+        # a worker that loses the race simply updates nothing.
+        jobs = []
+        for job in _claimable(now)[:batch_size]:
+            taken = Job.objects.filter(pk=job.pk, status=job.status, locked_at=job.locked_at).update(
+                status='running', locked_at=now, attempts=F('attempts') + 1,
+            )
+            if taken:
+                jobs.append(job)
+
+    for job in jobs:
+        job.status, job.locked_at, job.attempts = 'running', now, job.attempts + 1
+    return jobs
+
+
+# --------------------
+# RUNNING
+# --------------------
+def run_job(job):
+    """Run one claimed job and record the outcome; returns True on success."""
+    func = HANDLERS.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"No handler registered for job {job.name!r}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s/%s)", job, job.attempts, job.max_attempts)
+        if job.attempts >= job.max_attempts or func is None:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', last_error=error, finished_at=timezone.now(),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', last_error=error, locked_at=None,
+                run_at=timezone.now() + backoff(job.attempts),
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status='done', finished_at=timezone.now(), locked_at=None)
+    return True
+
+
+def work(batch_size=10):
+    """Claim and run one batch; returns how many jobs were processed."""
+    jobs = claim(batch_size)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def run_pending(max_batches=None):
+    """Drain the queue in this thread (tests, cron, the --once flag)."""
+    done = batches = 0
+    while max_batches is None or batches < max_batches:
+        processed = work()
+        if not processed:
+            break
+        done += processed
+        batches += 1
+    return done
@@ -0,0 +1,37 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.archive import BATCH_SIZE, archivable, archive_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old bookings into the archive in batched transactions: sessions more than "
+        "--older-than days ago, and cancelled/disapproved bookings closed more than "
+        "--closed-older-than days ago."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=365, help="Days since the session (default 365).")
+        parser.add_argument('--closed-older-than', type=int, default=30,
+                            help="Days since a booking was cancelled or disapproved (default 30).")
+        parser.add_argument('--keep-closed', action='store_true',
+                            help="Only archive by session date; leave recent cancellations alone.")
+        parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="Rows moved per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived.")
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1 or options['closed_older_than'] < 1 or options['batch'] < 1:
+            raise CommandError("--older-than, --closed-older-than and --batch must be at least 1.")
+        older_than = timedelta(days=options['older_than'])
+        closed_older_than = None if options['keep_closed'] else timedelta(days=options['closed_older_than'])
+
+        if options['dry_run']:
+            count = archivable(older_than, closed_older_than).count()
+            self.stdout.write(json.dumps({'archivable': count}))
+            return
+        moved = archive_bookings(older_than, closed_older_than, batch_size=options['batch'], pause=options['sleep'])
+        self.stdout.write(json.dumps({'archived': moved}))
@@ -0,0 +1,89 @@
+import json
+import statistics
+import threading
+import time as clock
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from bookings.availability import save_if_available
+from bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent booking creation against the configured database "
+        "backend. Runs on a throwaway test database; set DATABASE_URL to compare "
+        "PostgreSQL with SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--bookings', type=int, default=100, help="Bookings created per thread.")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            # The default in-memory test database would hide file locking and WAL
+            connection.settings_dict['TEST']['NAME'] = str(connection.settings_dict['NAME']) + '.bench'
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            result = self.run_benchmark(options['threads'], options['bookings'])
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_benchmark(self, threads, per_thread):
+        users = [User.objects.create_user(f'bench{i}') for i in range(threads)]
+        first_day = timezone.localdate() + timedelta(days=1)
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(index):
+            timings, failures = [], 0
+            for i in range(per_thread):
+                # One session per day per booking keeps every insert conflict-free
+                day = first_day + timedelta(days=index * per_thread + i)
+                booking = Booking(
+                    user=users[index],
+                    service_type='portrait',
+                    session_datetime=timezone.make_aware(datetime.combine(day, time(10, 0))),
+                )
+                started = clock.perf_counter()
+                try:
+                    save_if_available(booking)
+                except OperationalError:
+                    failures += 1
+                timings.append(clock.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies.extend(timings)
+                errors.append(failures)
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = clock.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = clock.perf_counter() - started
+
+        latencies.sort()
+        total = threads * per_thread
+        return {
+            'vendor': connection.vendor,
+            'threads': threads,
+            'bookings': total,
+            'failed': sum(errors),
+            'seconds': round(elapsed, 3),
+            'bookings_per_second': round(total / elapsed, 1),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies) * 1000, 2),
+                'p95': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2),
+            },
+        }
@@ -0,0 +1,149 @@
+import json
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+
+SERVERS = {
+    # name: (application, gunicorn worker class)
+    'wsgi': ('photography_studio.wsgi:application', 'sync'),
+    'asgi': ('photography_studio.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how many concurrent clients one gunicorn worker serves with the "
+        "WSGI app (sync worker) and the ASGI app (uvicorn worker). Starts each "
+        "server against the configured database; seed it first with seed_studio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi')
+        parser.add_argument('--concurrency', default='1,8,32', help="Comma-separated client counts.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per concurrency level.")
+        parser.add_argument('--slow-clients', type=int, default=0,
+                            help="Connections that trickle their request headers for the whole run.")
+        parser.add_argument('--url', default=None, help="Path to request (default: My Bookings).")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',')]
+        if set(servers) - set(SERVERS):
+            raise CommandError(f"--servers must be a subset of: {', '.join(SERVERS)}")
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        path = options['url'] or reverse('my_bookings')
+
+        session = self.bench_session()
+        try:
+            report = {
+                name: self.run_server(name, options['port'], path, session.session_key, levels, options)
+                for name in servers
+            }
+        finally:
+            session.delete()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def bench_session(self):
+        user = User.objects.filter(is_staff=False, is_active=True).order_by('pk').first()
+        if user is None:
+            raise CommandError("No client accounts found; run seed_studio first.")
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    def host_header(self):
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+        return hosts[0] if hosts else 'localhost'
+
+    def run_server(self, name, port, path, session_key, levels, options):
+        application, worker_class = SERVERS[name]
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', application, '--workers', '1',
+             '--worker-class', worker_class, '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        )
+        try:
+            self.wait_for_port(port, process)
+            slow = [
+                threading.Thread(target=self.slow_client, args=(port, path, 20 + len(levels) * 10), daemon=True)
+                for _ in range(options['slow_clients'])
+            ]
+            for thread in slow:
+                thread.start()
+            return {
+                str(level): self.load(port, path, session_key, level, options['requests'])
+                for level in levels
+            }
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    def wait_for_port(self, port, process, timeout=20):
+        deadline = clock.monotonic() + timeout
+        while clock.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("The server exited during startup; is uvicorn installed?")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return
+            except OSError:
+                clock.sleep(0.1)
+        raise CommandError(f"The server did not start listening on port {port}.")
+
+    def slow_client(self, port, path, seconds):
+        """Hold a connection open by sending one header line per second."""
+        with socket.create_connection(('127.0.0.1', port)) as sock:
+            sock.sendall(f'GET {path} HTTP/1.1\r\nHost: {self.host_header()}\r\n'.encode())
+            for i in range(seconds):
+                clock.sleep(1)
+                try:
+                    sock.sendall(f'X-Slow-{i}: 1\r\n'.encode())
+                except OSError:
+                    return
+
+    def load(self, port, path, session_key, concurrency, total):
+        headers = {'Host': self.host_header(), 'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}'}
+
+        def fetch(_):
+            connection = HTTPConnection('127.0.0.1', port, timeout=60)
+            started = clock.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                status = connection.getresponse().status
+            except OSError:
+                status = None
+            finally:
+                connection.close()
+            return clock.perf_counter() - started, status
+
+        started = clock.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = clock.perf_counter() - started
+
+        latencies = sorted(latency for latency, _status in results)
+        return {
+            'requests_per_second': round(total / elapsed, 1),
+            'errors': sum(1 for _latency, status in results if status != 200),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies) * 1000, 2),
+                'p95': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2),
+            },
+        }
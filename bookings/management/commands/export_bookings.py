@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.exports import FORMATS, parse_filters, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream bookings as CSV or NDJSON to stdout or a file, optionally filtered."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--start', help="First session date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--end', help="Last session date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--status', help="Only bookings with this status code.")
+        parser.add_argument('--service', help="Only bookings for this service.")
+        parser.add_argument('--include-history', action='store_true', help="Also export archived bookings.")
+        parser.add_argument('--output', help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_filters(options)
+        except ValueError as error:
+            raise CommandError(error)
+
+        lines = stream_export(options['format'], **filters)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+                handle.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
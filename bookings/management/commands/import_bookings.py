@@ -0,0 +1,69 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.imports import (
+    BATCH_SIZE, COLUMNS, FORMATS, READERS, check_encoding, guess_format, import_bookings, reject_writer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import bookings from a CSV (with a header row) or NDJSON file. Columns: "
+        + ', '.join(COLUMNS) + ". Bad rows are skipped and listed in the reject report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for stdin.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension (.ndjson/.jsonl, else CSV).")
+        parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="Rows per INSERT transaction.")
+        parser.add_argument('--rejects', help="Write rejected rows as CSV to this file.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only; write nothing.")
+
+    def handle(self, *args, **options):
+        if options['batch'] < 1:
+            raise CommandError("--batch must be at least 1.")
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+
+        if path != '-':
+            self.check_encoding(path)
+        source = sys.stdin if path == '-' else self.open(path)
+        rejects = open(options['rejects'], 'w', newline='', encoding='utf-8') if options['rejects'] else None
+        started = time.perf_counter()
+        try:
+            summary = import_bookings(
+                READERS[file_format](source),
+                batch_size=options['batch'],
+                dry_run=options['dry_run'],
+                on_reject=reject_writer(rejects) if rejects else None,
+            )
+        except UnicodeDecodeError:
+            # Only stdin gets here; files are checked before the first row is read
+            raise CommandError("Input is not valid UTF-8; batches before the bad line were imported.")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejects:
+                rejects.close()
+
+        elapsed = time.perf_counter() - started
+        summary['seconds'] = round(elapsed, 3)
+        summary['rows_per_second'] = round((summary['imported'] + summary['rejected']) / elapsed) if elapsed else 0
+        summary['dry_run'] = options['dry_run']
+        self.stdout.write(json.dumps(summary, indent=2))
+
+    def check_encoding(self, path):
+        try:
+            with open(path, 'rb') as raw:
+                check_encoding(raw)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+    def open(self, path):
+        try:
+            return open(path, newline='', encoding='utf-8-sig')
+        except OSError as error:
+            raise CommandError(error)
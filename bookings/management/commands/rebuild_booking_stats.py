@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from bookings.stats import rebuild_booking_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the BookingStats summary rows from the bookings table."
+
+    def handle(self, *args, **options):
+        summary = rebuild_booking_stats()
+        self.stdout.write(self.style.SUCCESS(
+            "Booking stats rebuilt: {created} created, {updated} updated, {deleted} deleted.".format(**summary)
+        ))
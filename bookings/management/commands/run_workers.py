@@ -0,0 +1,96 @@
+import signal
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from bookings.jobs import run_pending, work
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (client e-mails and other slow side effects) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Worker threads per process.")
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to start.")
+        parser.add_argument('--batch', type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit.")
+        parser.add_argument(
+            '--allow-sqlite', action='store_true',
+            help="Run against SQLite outside DEBUG (only when the web server uses the same file on this machine).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and not settings.DEBUG and not options['allow_sqlite']:
+            # A worker deployed as its own service gets its own SQLite file and never
+            # sees the jobs the web service enqueues
+            raise CommandError(
+                "run_workers needs the web service's database: set DATABASE_URL to the shared "
+                "PostgreSQL database, or pass --allow-sqlite if both use the same SQLite file."
+            )
+        if options['once']:
+            self.stdout.write(f"Processed {run_pending()} jobs.")
+            return
+        if options['processes'] > 1:
+            return self.run_processes(options)
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_args: stop.set())
+
+        threads = [
+            threading.Thread(target=self.loop, args=(stop, options['batch'], options['poll']), daemon=True)
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {len(threads)} job worker threads.")
+        while not stop.wait(1):
+            pass
+        # Let the current jobs finish
+        for thread in threads:
+            thread.join()
+
+    def loop(self, stop, batch, poll):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                if not work(batch):
+                    stop.wait(poll)
+        finally:
+            connection.close()
+
+    def child_argv(self, options):
+        """This command's options for a child process (each child runs a single process)."""
+        argv = [
+            sys.executable, sys.argv[0], 'run_workers',
+            '--threads', str(options['threads']),
+            '--batch', str(options['batch']),
+            '--poll', str(options['poll']),
+            '--verbosity', str(options['verbosity']),
+        ]
+        for option in ('settings', 'pythonpath'):
+            if options.get(option):
+                argv += [f'--{option}', options[option]]
+        for flag in ('allow_sqlite', 'traceback', 'no_color', 'force_color'):
+            if options.get(flag):
+                argv.append('--' + flag.replace('_', '-'))
+        return argv
+
+    def run_processes(self, options):
+        """Start one child per process, each with its own thread pool and database connections."""
+        command = self.child_argv(options)
+        children = [subprocess.Popen(command) for _ in range(options['processes'])]
+
+        def forward(sig, _frame):
+            for child in children:
+                child.send_signal(sig)
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, forward)
+        for child in children:
+            child.wait()
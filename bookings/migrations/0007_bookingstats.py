@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def backfill_booking_stats(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingStats = apps.get_model('bookings', 'BookingStats')
+    statuses = ['pending', 'approved', 'disapproved', 'cancelled']
+    services = ['portrait', 'wedding', 'product', 'event']
+
+    aggregates = {'total': models.Count('id')}
+    for status in statuses:
+        aggregates[status] = models.Count('id', filter=models.Q(status=status))
+    for service in services:
+        aggregates[service] = models.Count('id', filter=models.Q(service_type=service))
+
+    rows = [BookingStats(user_id=None, **Booking.objects.aggregate(**aggregates))]
+    for counts in Booking.objects.values('user_id').annotate(**aggregates).order_by():
+        rows.append(BookingStats(**counts))
+    BookingStats.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0006_booking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('disapproved', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('portrait', models.IntegerField(default=0)),
+                ('wedding', models.IntegerField(default=0)),
+                ('product', models.IntegerField(default=0)),
+                ('event', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'booking stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingstats',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('user', models.Value(0)), name='bookingstats_one_row_per_scope'),
+        ),
+        migrations.RunPython(backfill_booking_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def queue_pending_approvals(apps, schema_editor):
+    # Approvals the old my_bookings loop had not shown yet move into the outbox
+    Booking = apps.get_model('bookings', 'Booking')
+    Notification = apps.get_model('bookings', 'Notification')
+    labels = {'portrait': 'Portrait Session', 'wedding': 'Wedding Photoshoot',
+              'product': 'Product Photography', 'event': 'Event Coverage'}
+    Notification.objects.bulk_create(
+        Notification(
+            user_id=booking.user_id,
+            booking_id=booking.id,
+            event='approved',
+            message=(
+                f"Your booking for {labels.get(booking.service_type, booking.service_type)} on "
+                f"{booking.session_datetime.strftime('%Y-%m-%d %H:%M')} is now APPROVED."
+            ),
+        )
+        for booking in Booking.objects.filter(status='approved', notified=False).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0008_booking_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('approved', 'Approved'), ('disapproved', 'Disapproved'), ('cancelled', 'Cancelled'), ('rescheduled', 'Rescheduled')], max_length=12)),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='bookings.booking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('delivered_at__isnull', True)), fields=['user', 'created_at'], name='notification_undelivered_idx')],
+            },
+        ),
+        migrations.RunPython(queue_pending_approvals, migrations.RunPython.noop),
+    ]
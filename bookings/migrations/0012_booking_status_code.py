@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:35
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+STATUSES = ['pending', 'approved', 'disapproved', 'cancelled']
+# Spellings used by older templates and hand-edited rows
+ALIASES = {'denied': 'disapproved', 'rejected': 'disapproved', 'canceled': 'cancelled'}
+
+
+def normalize_statuses(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingStats = apps.get_model('bookings', 'BookingStats')
+
+    stray = Booking.objects.exclude(status__in=STATUSES)
+    if not stray.exists():
+        return
+    stray.update(status=Trim(Lower('status')))
+    for alias, status in ALIASES.items():
+        Booking.objects.filter(status=alias).update(status=status)
+    # Anything still unrecognised goes back to the approval queue
+    Booking.objects.exclude(status__in=STATUSES).update(status='pending')
+
+    # The counters never saw the stray values; recount from scratch
+    BookingStats.objects.all().delete()
+    import_module('bookings.migrations.0007_bookingstats').backfill_booking_stats(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_hot_column_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_statuses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('status__in', ['pending', 'approved', 'disapproved', 'cancelled'])), name='booking_status_code'),
+        ),
+    ]
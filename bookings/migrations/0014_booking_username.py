@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_usernames(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    owner_name = Subquery(User.objects.filter(pk=OuterRef('user_id')).values('username')[:1])
+    for model_name in ('Booking', 'ArchivedBooking'):
+        # One correlated UPDATE per table
+        apps.get_model('bookings', model_name).objects.update(username=owner_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_archivedbooking'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_session_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_status_session_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_service_session_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='username',
+            field=models.CharField(default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='username',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(copy_usernames, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['session_datetime', 'id', 'status', 'service_type', 'username'], name='booking_session_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'session_datetime', 'id', 'service_type', 'username'], name='booking_status_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['service_type', 'session_datetime', 'id', 'status', 'username'], name='booking_service_cover_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_booking_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['session_datetime', 'id'], name='archived_session_idx'),
+        ),
+    ]
@@ -1,6 +1,73 @@
-from django.db import models
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+from photography_studio.cache import bump_version
+
+
+# What a booking listing shows; all of it is in the covering keyset indexes
+LISTING_FIELDS = ('id', 'username', 'service_type', 'session_datetime', 'status')
+
+
+class BookingQuerySet(models.QuerySet):
+    def listing(self):
+        # The owner's username is copied onto the booking, so listings never join auth_user
+        return self.only(*LISTING_FIELDS)
+
+    def for_dashboard(self):
+        return self.listing().order_by('-session_datetime')
+
+    def set_status(self, status, event=None, **fields):
+        """
+        Bulk status change that keeps BookingStats in step.
+
+        queryset.update() skips save() and its signals, so the rows being moved
+        are read first and the counters adjusted in the same transaction. With
+        `event`, every updated booking is flagged unnotified and gets a
+        Notification queued for its owner. A plain status change skips rows
+        already in `status`; with other `fields` (a reschedule) every row moves.
+        """
+        bookings = self if fields else self.exclude(status=status)
+        with transaction.atomic():
+            # Lock the rows being moved; FOR UPDATE cannot be combined with GROUP BY
+            rows = list(bookings.select_for_update().values_list('id', 'user_id', 'status'))
+            deltas = defaultdict(Counter)
+            for _pk, user_id, old_status in rows:
+                if old_status == status:
+                    continue
+                for scope in (None, user_id):
+                    deltas[scope][old_status] -= 1
+                    deltas[scope][status] += 1
+            if event:
+                fields['notified'] = False
+            # One UPDATE ... WHERE id IN (...) for the rows just locked
+            moved = self.model.objects.filter(pk__in=[row[0] for row in rows])
+            updated = moved.update(status=status, updated_at=timezone.now(), **fields)
+            for scope, delta in deltas.items():
+                BookingStats.objects.apply(scope, delta)
+            if event and updated:
+                Notification.objects.notify_many(moved.only('id', 'user_id', 'service_type', 'session_datetime'), event)
+            bump_version('bookings')
+        return updated
+
+
+class BookingStatus(models.TextChoices):
+    # Stored as these fixed lowercase codes (enforced by a check constraint),
+    # so status filters are exact matches that can use the status indexes
+    PENDING = 'pending', 'Pending'
+    APPROVED = 'approved', 'Approved'
+    DISAPPROVED = 'disapproved', 'Disapproved'
+    CANCELLED = 'cancelled', 'Cancelled'
+
+
 class Booking(models.Model):
     SERVICE_CHOICES = [
         ('portrait', 'Portrait Session'),
@@ -9,20 +76,369 @@ class Booking(models.Model):
         ('event', 'Event Coverage'),
     ]
 
-    STATUS_CHOICES = [
-        ('pending', 'Pending'),
-        ('approved', 'Approved'),
-        ('disapproved', 'Disapproved'),
-        ('cancelled', 'Cancelled'),
-    ]
+    Status = BookingStatus
+    STATUS_CHOICES = Status.choices
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Lookups by user are served by booking_user_session_idx, whose leading column is user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # Copy of user.username (see save() and sync_booking_usernames()) for join-free listings
+    username = models.CharField(max_length=150, editable=False, default='')
     service_type = models.CharField(max_length=20, choices=SERVICE_CHOICES)
     session_datetime = models.DateTimeField()
-    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pending')
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDING)
     notes = models.TextField(blank=True, null=True)
     notified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    # (user_id, status, service_type) as last counted in BookingStats
+    _counted_state = None
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the admin booking table, optionally filtered, and the
+            # calendar window. The trailing LISTING_FIELDS columns make them covering, so
+            # a page is an index-only scan (key columns rather than INCLUDE, which SQLite lacks)
+            models.Index(
+                fields=['session_datetime', 'id', 'status', 'service_type', 'username'],
+                name='booking_session_cover_idx',
+            ),
+            models.Index(
+                fields=['status', 'session_datetime', 'id', 'service_type', 'username'],
+                name='booking_status_cover_idx',
+            ),
+            models.Index(
+                fields=['service_type', 'session_datetime', 'id', 'status', 'username'],
+                name='booking_service_cover_idx',
+            ),
+            # A client's own bookings by date: My Bookings and the next session on their dashboard
+            models.Index(fields=['user', 'session_datetime'], name='booking_user_session_idx'),
+            # Newest first: admin activity log, and recent cancellations per status
+            models.Index(fields=['created_at'], name='booking_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='booking_status_created_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(status__in=BookingStatus.values), name='booking_status_code'),
+        ]
+
+    def __str__(self):
+        return f"{self.username} - {self.get_service_type_display()} on {self.session_datetime.strftime('%Y-%m-%d %H:%M')} ({self.get_status_display()})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'user_id', 'status', 'service_type'} <= set(field_names):
+            instance._counted_state = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        return (self.user_id, self.status, self.service_type)
+
+    def save(self, *args, **kwargs):
+        # The copied username follows the owner, also when a booking is moved to another user
+        reassigned = self._counted_state is not None and self._counted_state[0] != self.user_id
+        if self.user_id and (not self.username or reassigned):
+            self.username = self.user.username
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'username'}
+        # post_save updates BookingStats; keep it in the same transaction as the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+# -----------------------------
+# MATERIALIZED BOOKING COUNTERS
+# -----------------------------
+class BookingStatsManager(models.Manager):
+    def apply(self, user_id, delta, create=True):
+        """
+        Add `delta` ({counter field: change}) to one stats row.
+
+        `user_id=None` is the studio-wide row. Missing rows are created unless
+        `create` is False (deletes must not resurrect rows of a deleted user).
+        """
+        delta = {field: change for field, change in delta.items() if change}
+        if not delta:
+            return
+        rows = self.filter(user_id=user_id) if user_id else self.filter(user__isnull=True)
+        changes = {field: F(field) + change for field, change in delta.items()}
+        if rows.update(**changes) or not create:
+            return
+        self.get_or_create(user_id=user_id)
+        rows.update(**changes)
+
+    def record_change(self, old, new, create=True):
+        """Move one booking's contribution from `old` to `new` counter state."""
+        deltas = defaultdict(Counter)
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            user_id, status, service_type = state
+            for scope in (None, user_id):
+                deltas[scope]['total'] += sign
+                deltas[scope][status] += sign
+                deltas[scope][service_type] += sign
+        for scope, delta in deltas.items():
+            self.apply(scope, delta, create=create)
+
+
+class BookingStats(models.Model):
+    """Running booking counts, one row per client plus one studio-wide row (user=None)."""
+
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='booking_stats')
+    total = models.IntegerField(default=0)
+
+    pending = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    disapproved = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    portrait = models.IntegerField(default=0)
+    wedding = models.IntegerField(default=0)
+    product = models.IntegerField(default=0)
+    event = models.IntegerField(default=0)
+
+    objects = BookingStatsManager()
+
+    COUNTER_FIELDS = [
+        'total',
+        *(value for value, _label in Booking.STATUS_CHOICES),
+        *(value for value, _label in Booking.SERVICE_CHOICES),
+    ]
+
+    class Meta:
+        verbose_name_plural = 'booking stats'
+        constraints = [
+            # NULLs never collide in a plain unique index, so coalesce the global row to 0
+            models.UniqueConstraint(Coalesce('user', Value(0)), name='bookingstats_one_row_per_scope'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.get_service_type_display()} on {self.session_datetime.strftime('%Y-%m-%d %H:%M')} ({self.get_status_display()})"
+        owner = self.user.username if self.user_id else 'Studio'
+        return f"{owner}: {self.total} bookings"
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.COUNTER_FIELDS}
+
+
+# -----------------------------
+# BOOKING HISTORY (ARCHIVE)
+# -----------------------------
+class ArchivedBooking(models.Model):
+    """
+    A booking moved out of the hot table by `manage.py archive_bookings`.
+
+    Keeps the original booking id. Archived rows are no longer counted in
+    BookingStats and only appear where history is asked for explicitly.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    username = models.CharField(max_length=150, default='')
+    service_type = models.CharField(max_length=20, choices=Booking.SERVICE_CHOICES)
+    session_datetime = models.DateTimeField()
+    status = models.CharField(max_length=12, choices=Booking.Status.choices)
+    notes = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # Copied column for column from Booking
+    COPIED_FIELDS = ['id', 'user_id', 'username', 'service_type', 'session_datetime', 'status', 'notes', 'created_at', 'updated_at']
+
+    class Meta:
+        indexes = [
+            # A client's history on My Bookings
+            models.Index(fields=['user', 'session_datetime'], name='archived_user_session_idx'),
+            # History pages of the dashboard table and history windows of the calendar feed
+            models.Index(fields=['session_datetime', 'id'], name='archived_session_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.username} - {self.get_service_type_display()} on {self.session_datetime.strftime('%Y-%m-%d %H:%M')} ({self.get_status_display()}, archived)"
+
+
+def sync_booking_usernames(user):
+    """Copy a renamed user's username onto their live and archived bookings."""
+    with transaction.atomic():
+        # Touch updated_at so the calendar feed's ETag and Last-Modified change
+        Booking.objects.filter(user=user).exclude(username=user.username).update(
+            username=user.username, updated_at=timezone.now(),
+        )
+        # Archived rows keep their original updated_at; nothing caches on it
+        ArchivedBooking.objects.filter(user=user).exclude(username=user.username).update(username=user.username)
+    bump_version('bookings')
+
+
+# -----------------------------
+# CLIENT NOTIFICATION OUTBOX
+# -----------------------------
+class NotificationManager(models.Manager):
+    MESSAGES = {
+        'approved': "Your booking for {service} on {when} is now APPROVED.",
+        'disapproved': "Your booking for {service} on {when} was not approved.",
+        'cancelled': "Your booking for {service} on {when} has been cancelled by the studio.",
+        'rescheduled': "Your booking for {service} has been moved to {when} and is awaiting approval.",
+    }
+
+    def build(self, booking, event):
+        message = self.MESSAGES[event].format(
+            service=booking.get_service_type_display(),
+            when=booking.session_datetime.strftime('%Y-%m-%d %H:%M'),
+        )
+        return self.model(user_id=booking.user_id, booking=booking, event=event, message=message)
+
+    def notify(self, booking, event):
+        """Queue a message for the booking's owner; call inside the status change's transaction."""
+        return self.notify_many([booking], event)[0]
+
+    def notify_many(self, bookings, event):
+        notifications = self.bulk_create([self.build(booking, event) for booking in bookings])
+        # Anything slower than this INSERT (e-mail today) runs on the job workers
+        Job.objects.enqueue_many('email_notification', [{'notification_id': n.pk} for n in notifications])
+        return notifications
+
+    def deliver(self, user):
+        """
+        Return the user's undelivered messages and mark them delivered.
+
+        One read and at most two UPDATEs, however many bookings changed.
+        """
+        pending = list(
+            self.filter(user=user, delivered_at__isnull=True)
+            .order_by('created_at', 'id')
+            .values_list('id', 'booking_id', 'message')
+        )
+        if pending:
+            with transaction.atomic():
+                self.filter(id__in=[row[0] for row in pending]).update(delivered_at=timezone.now())
+                Booking.objects.filter(id__in={row[1] for row in pending}, notified=False).update(notified=True)
+        return [message for _id, _booking_id, message in pending]
+
+
+class Notification(models.Model):
+    EVENT_CHOICES = [
+        ('approved', 'Approved'),
+        ('disapproved', 'Disapproved'),
+        ('cancelled', 'Cancelled'),
+        ('rescheduled', 'Rescheduled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_notifications')
+    booking = models.ForeignKey(Booking, null=True, blank=True, on_delete=models.SET_NULL, related_name='notifications')
+    event = models.CharField(max_length=12, choices=EVENT_CHOICES)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    objects = NotificationManager()
+
+    class Meta:
+        indexes = [
+            # my_bookings only ever asks for one user's undelivered messages
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(delivered_at__isnull=True),
+                name='notification_undelivered_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.message}"
+
+
+# -----------------------------
+# BACKGROUND JOBS
+# -----------------------------
+class JobManager(models.Manager):
+    def enqueue(self, name, run_at=None, **payload):
+        """Queue `name` (a handler registered in bookings.jobs); commits with the caller's transaction."""
+        return self.enqueue_many(name, [payload], run_at=run_at)[0]
+
+    def enqueue_many(self, name, payloads, run_at=None):
+        run_at = run_at or timezone.now()
+        return self.bulk_create([self.model(name=name, payload=payload, run_at=run_at) for payload in payloads])
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            # Workers only ever poll for due queued jobs and expired leases
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='queued'), name='job_due_idx'),
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+# True while a bulk operation adjusts BookingStats and bumps the cache version itself
+_counted_in_bulk = ContextVar('bookings_counted_in_bulk', default=False)
+
+
+@contextmanager
+def counted_in_bulk():
+    """Skip the per-row counter and cache receivers below; the caller settles both once."""
+    token = _counted_in_bulk.set(True)
+    try:
+        yield
+    finally:
+        _counted_in_bulk.reset(token)
+
+
+@receiver(pre_save, sender=Booking)
+def load_counted_state(sender, instance, raw=False, **kwargs):
+    # Instances built by hand for an existing row have not been counted from_db
+    if raw or instance._state.adding or instance._counted_state is not None:
+        return
+    stored = sender.objects.filter(pk=instance.pk).values_list('user_id', 'status', 'service_type').first()
+    instance._counted_state = stored
+
+
+@receiver(post_save, sender=Booking)
+def count_saved_booking(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = instance.counter_state()
+    old = None if created else instance._counted_state
+    if old != new:
+        BookingStats.objects.record_change(old, new)
+    instance._counted_state = new
+
+
+@receiver(post_delete, sender=Booking)
+def count_deleted_booking(sender, instance, **kwargs):
+    if _counted_in_bulk.get():
+        return
+    old = instance._counted_state or instance.counter_state()
+    BookingStats.objects.record_change(old, None, create=False)
+    instance._counted_state = None
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_caches(sender, raw=False, **kwargs):
+    if not raw and not _counted_in_bulk.get():
+        bump_version('bookings')
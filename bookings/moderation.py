@@ -0,0 +1,58 @@
+"""
+Bulk moderation from the admin dashboard and the Django admin.
+
+A batch is applied with one UPDATE ... WHERE id IN (...) inside a single
+transaction (see BookingQuerySet.set_status), so clearing hundreds of pending
+requests costs a handful of queries instead of a request per booking.
+"""
+
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+
+from .availability import BLOCKING_STATUSES, check_batch_available, lock_schedule
+from .models import Booking
+
+
+ACTIONS = {
+    # action: (new status, notification event, past tense for messages)
+    'approve': (Booking.Status.APPROVED, 'approved', 'approved'),
+    'disapprove': (Booking.Status.DISAPPROVED, 'disapproved', 'denied'),
+    'cancel': (Booking.Status.CANCELLED, 'cancelled', 'cancelled'),
+    'reschedule': (Booking.Status.PENDING, 'rescheduled', 'rescheduled'),
+}
+MAX_BATCH = 1000
+MAX_SHIFT_DAYS = 365
+
+
+def moderate_bookings(booking_ids, action, shift=timedelta(0)):
+    """
+    Apply `action` to the given bookings and return how many changed.
+
+    'reschedule' moves every selected session by `shift` and sets it back to
+    pending. Anything that would put a session on the calendar is checked for
+    clashes first; if one booking fails, ValidationError is raised and nothing
+    is changed.
+    """
+    status, event, _label = ACTIONS[action]
+    bookings = Booking.objects.filter(pk__in=booking_ids)
+    if action != 'reschedule':
+        # Rows already in the target state keep their flags and get no message
+        bookings = bookings.exclude(status=status)
+
+    with transaction.atomic():
+        if status in BLOCKING_STATUSES:
+            lock_schedule()
+            moving = bookings if shift else bookings.exclude(status__in=BLOCKING_STATUSES)
+            errors = check_batch_available([
+                (pk, service_type, start + shift)
+                for pk, service_type, start in moving.values_list('pk', 'service_type', 'session_datetime')
+            ])
+            if errors:
+                raise ValidationError([f"Booking #{pk} {message}" for pk, message in sorted(errors.items())])
+
+        if shift:
+            return bookings.set_status(status, event, session_datetime=F('session_datetime') + shift)
+        return bookings.set_status(status, event)
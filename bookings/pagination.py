@@ -0,0 +1,93 @@
+import base64
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Booking
+
+
+PAGE_SIZE = 25
+
+
+# --------------------
+# CURSOR ENCODING
+# --------------------
+def encode_cursor(obj, field='session_datetime'):
+    raw = f"{getattr(obj, field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (aware datetime, id) for a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        value = parse_datetime(stamp)
+        pk = int(pk)
+    except (ValueError, UnicodeError):
+        return None
+    # Ids beyond a 64-bit integer cannot be bound as query parameters
+    if value is None or not -2 ** 63 <= pk < 2 ** 63:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value, pk
+
+
+# --------------------
+# KEYSET PAGE
+# --------------------
+def keyset_page(queryset, after=None, before=None, per_page=PAGE_SIZE, field='session_datetime'):
+    """
+    Slice `queryset` newest-first on (`field`, id).
+
+    Only the rows of the requested page (plus one look-ahead row) are read, so
+    the cost of a page does not depend on how many rows came before it.
+    `field` is a datetime column backed by an index on (field, id).
+    """
+    after_key = decode_cursor(after) if after else None
+    before_key = decode_cursor(before) if before else None
+
+    if before_key:
+        value, pk = before_key
+        rows = list(
+            queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+            .order_by(field, 'id')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after_key:
+            value, pk = after_key
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-id')[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_key is not None
+
+    return {
+        'object_list': rows,
+        'has_next': has_next and bool(rows),
+        'has_previous': has_previous and bool(rows),
+        'next_cursor': encode_cursor(rows[-1], field) if rows else None,
+        'previous_cursor': encode_cursor(rows[0], field) if rows else None,
+    }
+
+
+def page_querystring(params, **cursor):
+    """Build a querystring keeping the active filters and swapping the cursor."""
+    query = {key: value for key, value in params.items() if value and key not in ('after', 'before')}
+    query.update(cursor)
+    return '?' + urlencode(query)
+
+
+def filter_bookings(queryset, status=None, service=None):
+    """Apply the admin table filters, ignoring values that are not valid choices."""
+    if status in dict(Booking.STATUS_CHOICES):
+        queryset = queryset.filter(status=status)
+    if service in dict(Booking.SERVICE_CHOICES):
+        queryset = queryset.filter(service_type=service)
+    return queryset
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Booking, BookingStats
+
+
+def _counter_aggregates():
+    aggregates = {'total': Count('id')}
+    for status, _label in Booking.STATUS_CHOICES:
+        aggregates[status] = Count('id', filter=Q(status=status))
+    for service, _label in Booking.SERVICE_CHOICES:
+        aggregates[service] = Count('id', filter=Q(service_type=service))
+    return aggregates
+
+
+# --------------------
+# BOOKING COUNTS
+# --------------------
+def booking_counts(user=None):
+    """
+    Per-status and per-service booking counts, read from BookingStats.
+
+    Pass `user` for one client's numbers; leave it out for studio-wide totals.
+    Keys are 'total', each status value and each service value.
+    """
+    stats = _stats_rows(user).first()
+    if stats is None:
+        return dict.fromkeys(BookingStats.COUNTER_FIELDS, 0)
+    return stats.as_dict()
+
+
+async def abooking_counts(user=None):
+    """Async booking_counts() for the ASGI views."""
+    stats = await _stats_rows(user).afirst()
+    if stats is None:
+        return dict.fromkeys(BookingStats.COUNTER_FIELDS, 0)
+    return stats.as_dict()
+
+
+def _stats_rows(user):
+    if user is None:
+        return BookingStats.objects.filter(user__isnull=True)
+    return BookingStats.objects.filter(user=user)
+
+
+def aggregate_booking_counts(user=None):
+    """Same numbers as booking_counts(), recomputed from bookings in one aggregate query."""
+    queryset = Booking.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset.aggregate(**_counter_aggregates())
+
+
+# --------------------
+# RECONCILE
+# --------------------
+def rebuild_booking_stats():
+    """
+    Recount BookingStats from the bookings table and fix any rows that drifted.
+
+    Returns a dict with how many rows were created, updated and deleted.
+    """
+    fresh = {None: aggregate_booking_counts()}
+    per_user = Booking.objects.values('user_id').annotate(**_counter_aggregates()).order_by()
+    for row in per_user:
+        fresh[row.pop('user_id')] = row
+
+    summary = {'created': 0, 'updated': 0, 'deleted': 0}
+    with transaction.atomic():
+        for stats in BookingStats.objects.select_for_update():
+            counts = fresh.pop(stats.user_id, None)
+            if counts is None:
+                stats.delete()
+                summary['deleted'] += 1
+            elif counts != stats.as_dict():
+                BookingStats.objects.filter(pk=stats.pk).update(**counts)
+                summary['updated'] += 1
+        BookingStats.objects.bulk_create(
+            BookingStats(user_id=user_id, **counts) for user_id, counts in fresh.items()
+        )
+        summary['created'] = len(fresh)
+    return summary
@@ -0,0 +1,24 @@
+"""Job handlers; imported by BookingsConfig.ready so they are registered in every process."""
+
+from django.core.mail import send_mail
+
+from .jobs import handler
+from .models import Notification
+
+
+@handler('email_notification')
+def email_notification(notification_id):
+    """E-mail a queued client notification; the in-app copy is shown on My Bookings regardless."""
+    notification = (
+        Notification.objects.select_related('user')
+        .filter(pk=notification_id)
+        .first()
+    )
+    if notification is None or not notification.user.email:
+        return
+    send_mail(
+        subject=f"Kurumi Studio: booking {notification.get_event_display().lower()}",
+        message=notification.message,
+        from_email=None,
+        recipient_list=[notification.user.email],
+    )
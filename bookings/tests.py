@@ -1,3 +1,815 @@
+import base64
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from photography_studio.cache import get_versions
+from .archive import archive_bookings
+from .availability import free_slots
+from .feeds import _event_rows
+from .jobs import LEASE, backoff, claim, handler, run_pending
+from .models import ArchivedBooking, Booking, Job, Notification, sync_booking_usernames
+from .pagination import decode_cursor, keyset_page
+from .stats import aggregate_booking_counts, booking_counts, rebuild_booking_stats
+
+
+class BookingViewQueryCountTests(TestCase):
+    """Query counts must not grow with the number of bookings on the page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        start = timezone.now() + timedelta(days=1)
+        cls.bookings = [
+            Booking.objects.create(
+                user=cls.client_user,
+                service_type='portrait',
+                session_datetime=start + timedelta(hours=i),
+                notified=True,
+            )
+            for i in range(5)
+        ]
+        cls.booking = cls.bookings[0]
+
+    def test_my_bookings(self):
+        self.client.force_login(self.client_user)
+        # user (the session is cached), undelivered notifications, listing
+        with self.assertNumQueries(3):
+            self.client.get(reverse('my_bookings'))
+
+    def test_async_views_require_login(self):
+        for url in (reverse('my_bookings'), reverse('booking_details', args=[self.booking.pk])):
+            response = self.client.get(url)
+            self.assertRedirects(response, f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+
+    def test_booking_details(self):
+        self.client.force_login(self.client_user)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('booking_details', args=[self.booking.pk]))
+
+    def test_update_booking_form(self):
+        self.client.force_login(self.client_user)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('update_booking', args=[self.booking.pk]))
+
+    def test_admin_update_booking_form(self):
+        self.client.force_login(self.admin)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('admin_update_booking', args=[self.booking.pk]))
+
+    def test_reschedule_booking_form(self):
+        self.client.force_login(self.admin)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('reschedule_booking', args=[self.booking.pk]))
+
+    def test_approve_booking(self):
+        self.client.force_login(self.admin)
+        # user, fetch, then save + global/user counters + outbox row + e-mail job (two savepoints)
+        with self.assertNumQueries(11):
+            self.client.get(reverse('approve_booking', args=[self.booking.pk]))
+
+    def test_approving_twice_queues_one_message(self):
+        self.client.force_login(self.admin)
+        for _ in range(2):
+            self.client.get(reverse('approve_booking', args=[self.booking.pk]))
+        self.assertEqual(Notification.objects.filter(booking=self.booking).count(), 1)
+        self.assertEqual(Job.objects.filter(name='email_notification').count(), 1)
+
+        # Nor does a bulk status change
+        Booking.objects.filter(pk=self.booking.pk).set_status('approved', event='approved')
+        self.assertEqual(Notification.objects.filter(booking=self.booking).count(), 1)
+
+    def test_my_bookings_delivers_notifications_in_bulk(self):
+        self.client.force_login(self.admin)
+        for booking in self.bookings:
+            self.client.get(reverse('approve_booking', args=[booking.pk]))
+
+        self.client.force_login(self.client_user)
+        # user, undelivered notifications, mark delivered + bookings notified, listing
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(list(response.context['messages'])), 5)
+        self.assertFalse(Notification.objects.filter(delivered_at__isnull=True).exists())
+        self.assertFalse(Booking.objects.filter(notified=False).exists())
+
+
+class BookingStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pw')
+        self.when = timezone.now() + timedelta(days=1)
+
+    def assertCountersMatch(self):
+        self.assertEqual(booking_counts(), aggregate_booking_counts())
+        self.assertEqual(booking_counts(self.user), aggregate_booking_counts(self.user))
+
+    def test_counters_follow_saves_bulk_updates_and_deletes(self):
+        first = Booking.objects.create(user=self.user, service_type='event', session_datetime=self.when)
+        second = Booking.objects.create(user=self.user, service_type='product', session_datetime=self.when)
+        self.assertEqual(booking_counts(self.user)['pending'], 2)
+
+        first.status = 'approved'
+        first.save()
+        Booking.objects.filter(pk=second.pk).set_status('disapproved')
+        self.assertCountersMatch()
+
+        Booking.objects.get(pk=second.pk).delete()
+        self.assertCountersMatch()
+        self.assertEqual(booking_counts()['total'], 1)
+
+    def test_only_status_codes_are_stored(self):
+        booking = Booking.objects.create(user=self.user, service_type='event', session_datetime=self.when)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.filter(pk=booking.pk).update(status='Approved')
+        self.assertEqual(Booking.objects.filter(status=Booking.Status.PENDING).count(), 1)
+
+    def test_rebuild_repairs_drift(self):
+        Booking.objects.create(user=self.user, service_type='event', session_datetime=self.when)
+        Booking.objects.filter(status='pending').update(status='cancelled')
+
+        summary = rebuild_booking_stats()
+
+        self.assertEqual(summary['updated'], 2)
+        self.assertCountersMatch()
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('client', 'client@example.com', 'pw')
+        cls.day = timezone.localdate() + timedelta(days=2)
+        cls.ten_am = timezone.make_aware(datetime.combine(cls.day, time(10, 0)))
+        Booking.objects.create(user=cls.user, service_type='product', session_datetime=cls.ten_am)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def book(self, start, service='portrait'):
+        return self.client.post(reverse('create_booking'), {
+            'service_type': service,
+            'session_datetime': timezone.localtime(start).strftime('%Y-%m-%dT%H:%M'),
+        })
+
+    def test_overlapping_booking_is_rejected(self):
+        response = self.book(self.ten_am + timedelta(hours=1))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_booking_after_buffer_is_accepted(self):
+        response = self.book(self.ten_am + timedelta(hours=2, minutes=30))
+        self.assertRedirects(response, reverse('my_bookings'), fetch_redirect_response=False)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_booking_outside_studio_hours_is_rejected(self):
+        self.book(self.ten_am.replace(hour=17, minute=30))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_legacy_booking_outside_hours_stays_editable(self):
+        evening = Booking.objects.create(
+            user=self.user, service_type='portrait', session_datetime=self.ten_am.replace(hour=20),
+        )
+        local = timezone.localtime(evening.session_datetime).strftime('%Y-%m-%dT%H:%M')
+        url = reverse('update_booking', args=[evening.pk])
+        response = self.client.post(url, {'service_type': 'portrait', 'session_datetime': local, 'notes': 'Side door'})
+        self.assertRedirects(response, reverse('my_bookings'), fetch_redirect_response=False)
+        evening.refresh_from_db()
+        self.assertEqual(evening.notes, 'Side door')
+
+        # Moving it is held to studio hours
+        later = timezone.localtime(evening.session_datetime + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M')
+        response = self.client.post(url, {'service_type': 'portrait', 'session_datetime': later, 'notes': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('session_datetime'))
+
+    def test_free_slots_skip_busy_window(self):
+        starts = [start for start, _end in free_slots('portrait', self.day, self.day)]
+        self.assertNotIn(self.ten_am - timedelta(hours=1), starts)
+        self.assertNotIn(self.ten_am + timedelta(hours=2), starts)
+        self.assertIn(self.ten_am + timedelta(hours=2, minutes=30), starts)
+
+    def test_availability_endpoint(self):
+        response = self.client.get(reverse('booking_availability'), {
+            'service': 'wedding', 'start': self.day.isoformat(), 'end': self.day.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['slots']), 0)
+
+
+class BookingIndexTests(TestCase):
+    """Every hot booking query must be answered from an index, not a table scan."""
+
+    ROWS = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f'client{i}') for i in range(200)])
+        cls.user = users[0]
+        start = timezone.now() - timedelta(days=365)
+        statuses = ['pending', 'approved', 'approved', 'disapproved', 'cancelled']
+        services = [value for value, _label in Booking.SERVICE_CHOICES]
+        Booking.objects.bulk_create(
+            (
+                Booking(
+                    user=users[i % len(users)],
+                    username=users[i % len(users)].username,
+                    service_type=services[i % len(services)],
+                    status=statuses[i % len(statuses)],
+                    session_datetime=start + timedelta(minutes=7 * i),
+                    notified=i % 50 != 0,
+                )
+                for i in range(cls.ROWS)
+            ),
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        table = Booking._meta.db_table
+        full_scans = [
+            line for line in plan.splitlines()
+            if f'Seq Scan on {table}' in line                      # PostgreSQL
+            or line.rstrip().endswith(f'SCAN {table}')             # SQLite without an index
+        ]
+        self.assertEqual(full_scans, [], plan)
+        if queryset.query.order_by:
+            self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+        return plan
+
+    def test_client_views(self):
+        mine = Booking.objects.filter(user=self.user)
+        self.assertUsesIndex(mine.order_by('-session_datetime'))                                  # my_bookings
+        self.assertUsesIndex(mine.filter(session_datetime__gte=timezone.now()).order_by('session_datetime')[:1])  # dashboard
+
+    def test_admin_dashboard(self):
+        dashboard = Booking.objects.for_dashboard()
+        self.assertUsesIndex(dashboard.filter(status='pending')[:5])
+        self.assertUsesIndex(dashboard.filter(status='cancelled').order_by('-created_at')[:5])
+        self.assertUsesIndex(dashboard.order_by('-created_at')[:5])
+        self.assertUsesIndex(Booking.objects.filter(status='approved').order_by('session_datetime', 'id')[:26])
+
+    def test_calendar_window(self):
+        start = timezone.now()
+        self.assertUsesIndex(Booking.objects.filter(session_datetime__gte=start, session_datetime__lt=start + timedelta(days=30)))
+
+    def assertIndexOnly(self, queryset):
+        plan = self.assertUsesIndex(queryset)
+        self.assertTrue('COVERING INDEX' in plan or 'Index Only Scan' in plan, plan)
+
+    def test_listings_never_touch_the_table(self):
+        listing = Booking.objects.listing()
+        self.assertIndexOnly(listing.order_by('-session_datetime', '-id')[:26])
+        self.assertIndexOnly(listing.filter(status='pending').order_by('-session_datetime', '-id')[:26])
+        self.assertIndexOnly(listing.filter(service_type='event').order_by('-session_datetime', '-id')[:26])
+        start = timezone.now()
+        self.assertIndexOnly(_event_rows(start, start + timedelta(days=30)))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        user = User.objects.create_user('client', 'client@example.com', 'pw')
+        when = timezone.now().replace(microsecond=0) + timedelta(days=2)
+        # Seven sessions share one start time, so only the id breaks the ties
+        for offset in [0] * 7 + [1, 2, 3]:
+            Booking.objects.create(user=user, service_type='portrait', session_datetime=when + timedelta(days=offset))
+        cls.newest_first = list(Booking.objects.order_by('-session_datetime', '-id').values_list('pk', flat=True))
+
+    def test_next_and_previous_pages_walk_every_row_once(self):
+        bookings = Booking.objects.listing()
+        pages, after = [], None
+        while True:
+            page = keyset_page(bookings, after=after, per_page=3)
+            pages.append([b.pk for b in page['object_list']])
+            if not page['has_next']:
+                break
+            after = page['next_cursor']
+        self.assertEqual([pk for rows in pages for pk in rows], self.newest_first)
+
+        # Back from the last page, one page at a time
+        back, before = [pages[-1]], page['previous_cursor']
+        while True:
+            page = keyset_page(bookings, before=before, per_page=3)
+            back.insert(0, [b.pk for b in page['object_list']])
+            if not page['has_previous']:
+                break
+            before = page['previous_cursor']
+        self.assertEqual(back, pages)
+
+    def test_cursors_decode_to_aware_datetimes(self):
+        naive = base64.urlsafe_b64encode(b'2030-01-01T10:00:00|5').decode()
+        value, pk = decode_cursor(naive)
+        self.assertTrue(timezone.is_aware(value))
+        self.assertEqual(pk, 5)
+
+    def test_tampered_cursors_fall_back_to_the_first_page(self):
+        self.client.force_login(self.admin)
+        panel = reverse('admin_dashboard_panel', args=['bookings'])
+        first = [b.pk for b in self.client.get(panel).context['booking_page']['object_list']]
+        for cursor in ('not base64!', base64.urlsafe_b64encode(b'yesterday|1').decode(),
+                       base64.urlsafe_b64encode(b'2030-01-01T10:00:00+00:00|' + b'9' * 30).decode(), '\u00e9'):
+            for direction in ('after', 'before'):
+                response = self.client.get(panel, {direction: cursor})
+                self.assertEqual(response.status_code, 200, cursor)
+                self.assertEqual([b.pk for b in response.context['booking_page']['object_list']], first, cursor)
+
+
+class BulkModerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        cls.user = User.objects.create_user('client', 'client@example.com', 'pw')
+        cls.day = timezone.localdate() + timedelta(days=3)
+        cls.bookings = [
+            Booking.objects.create(
+                user=cls.user,
+                service_type='portrait',
+                session_datetime=timezone.make_aware(datetime.combine(cls.day + timedelta(days=i), time(10, 0))),
+                notified=True,
+            )
+            for i in range(6)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def moderate(self, action, bookings, **extra):
+        return self.client.post(reverse('bulk_moderate_bookings'), {
+            'action': action,
+            'booking_ids': [booking.pk for booking in bookings],
+            **extra,
+        })
+
+    def test_approve_many_in_constant_queries(self):
+        # user, lock, clash check, locked read, UPDATE, 2 counters, notification
+        # re-read, outbox and job INSERTs, plus savepoints; the same for two bookings or four
+        with self.assertNumQueries(14):
+            response = self.moderate('approve', self.bookings[:2])
+        self.assertRedirects(response, reverse('admin_dashboard'), fetch_redirect_response=False)
+        # (and the user is cached by now)
+        with self.assertNumQueries(13):
+            self.moderate('approve', self.bookings[2:])
+
+        self.assertEqual(set(Booking.objects.values_list('status', 'notified')), {('approved', False)})
+        self.assertEqual(Notification.objects.filter(event='approved').count(), 6)
+        self.assertEqual(booking_counts(), aggregate_booking_counts())
+
+    def test_unchanged_bookings_are_not_notified_again(self):
+        self.moderate('approve', self.bookings[:1])
+        self.moderate('approve', self.bookings[:2])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_reschedule_moves_sessions_or_changes_nothing(self):
+        fifth, sixth = self.bookings[4:]
+        # Moving only the fifth session a day later clashes with the sixth
+        self.moderate('reschedule', [fifth], shift_days=1)
+        fifth.refresh_from_db()
+        self.assertEqual(timezone.localtime(fifth.session_datetime).date(), self.day + timedelta(days=4))
+
+        # Moving both together is fine
+        self.moderate('reschedule', [fifth, sixth], shift_days=1)
+        fifth.refresh_from_db()
+        self.assertEqual(timezone.localtime(fifth.session_datetime).date(), self.day + timedelta(days=5))
+        self.assertEqual(Notification.objects.filter(event='rescheduled').count(), 2)
+
+    def test_admin_action_resets_notified(self):
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'pw'))
+        self.client.post(reverse('admin:bookings_booking_changelist'), {
+            'action': 'approve_bookings',
+            '_selected_action': [self.bookings[0].pk],
+        })
+        self.bookings[0].refresh_from_db()
+        self.assertEqual((self.bookings[0].status, self.bookings[0].notified), ('approved', False))
+        self.assertEqual(Notification.objects.filter(booking=self.bookings[0]).count(), 1)
+
+    def test_staff_edit_cannot_overlap_another_session(self):
+        first, second = self.bookings[:2]
+        taken = timezone.localtime(second.session_datetime).strftime('%Y-%m-%dT%H:%M')
+        response = self.client.post(reverse('admin_update_booking', args=[first.pk]), {
+            'service_type': 'portrait',
+            'session_datetime': taken,
+            'notes': '',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('session_datetime'))
+        first.refresh_from_db()
+        self.assertEqual(first.session_datetime, self.bookings[0].session_datetime)
+
+    def test_django_admin_edit_cannot_overlap_another_session(self):
+        first, second = self.bookings[:2]
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'pw'))
+        url = reverse('admin:bookings_booking_change', args=[first.pk])
+        taken = timezone.localtime(second.session_datetime)
+        data = {
+            'user': self.user.pk,
+            'service_type': 'portrait',
+            'session_datetime_0': taken.strftime('%Y-%m-%d'),
+            'session_datetime_1': taken.strftime('%H:%M:%S'),
+            'status': 'pending',
+            'notes': '',
+            'notified': 'on',
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['adminform'].form.has_error('session_datetime'))
+        first.refresh_from_db()
+        self.assertEqual(first.session_datetime, self.bookings[0].session_datetime)
+
+        # Edits that leave the schedule alone still go through
+        data.update(
+            session_datetime_0=timezone.localtime(first.session_datetime).strftime('%Y-%m-%d'),
+            session_datetime_1='10:00:00',
+            notes='Bring a tripod',
+        )
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+        first.refresh_from_db()
+        self.assertEqual(first.notes, 'Bring a tripod')
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        for i in range(3):
+            Booking.objects.create(user=cls.admin, service_type='event', session_datetime=cls.start + timedelta(days=i))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.window = {
+            'start': (self.start - timedelta(hours=1)).isoformat(),
+            'end': (self.start + timedelta(days=2)).isoformat(),
+        }
+
+    async def test_feed_streams_window_only(self):
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        response = await self.async_client.get(reverse('calendar_feed'), self.window)
+        events = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['classNames'], ['event-pending'])
+
+    def test_unchanged_window_is_not_modified(self):
+        etag = self.client.get(reverse('calendar_feed'), self.window)['ETag']
+        response = self.client.get(reverse('calendar_feed'), self.window, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Booking.objects.filter(session_datetime=self.start).set_status('approved')
+        response = self.client.get(reverse('calendar_feed'), self.window, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_is_staff_only(self):
+        self.client.force_login(User.objects.create_user('client'))
+        response = self.client.get(reverse('calendar_feed'), self.window)
+        self.assertEqual(response.status_code, 302)
+
+
+class UsernameCopyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pw')
+        self.booking = Booking.objects.create(
+            user=self.user, service_type='portrait', session_datetime=timezone.now() + timedelta(days=3),
+        )
+
+    def test_new_bookings_copy_the_username(self):
+        self.assertEqual(Booking.objects.get().username, 'client')
+
+    def test_renaming_in_edit_profile_updates_bookings(self):
+        ArchivedBooking.objects.create(
+            id=999, user=self.user, username='client', service_type='event',
+            session_datetime=timezone.now(), status='approved', created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse('edit_profile'), {
+            'username': 'renamed', 'email': 'client@example.com', 'display_name': '', 'avatar': 'iconA',
+        })
+        self.assertEqual(Booking.objects.get().username, 'renamed')
+        self.assertEqual(ArchivedBooking.objects.get().username, 'renamed')
+
+    def test_rename_changes_the_calendar_etag(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        self.client.force_login(admin)
+        window = {
+            'start': timezone.now().isoformat(),
+            'end': (timezone.now() + timedelta(days=7)).isoformat(),
+        }
+        etag = self.client.get(reverse('calendar_feed'), window)['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+        sync_booking_usernames(self.user)
+        response = self.client.get(reverse('calendar_feed'), window, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_reassigning_a_booking_copies_the_new_owner(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        booking = Booking.objects.get()
+        booking.user = other
+        booking.save()
+        self.assertEqual(Booking.objects.get().username, 'other')
+
+    def test_admin_search_is_a_username_prefix(self):
+        other = User.objects.create_user('someone', 'someone@example.com', 'pw')
+        Booking.objects.create(user=other, service_type='event', session_datetime=timezone.now() + timedelta(days=4))
+        self.client.force_login(User.objects.create_superuser('root', 'root@example.com', 'pw'))
+        url = reverse('admin:bookings_booking_changelist')
+        self.assertEqual(list(self.client.get(url, {'q': 'cli'}).context['cl'].result_list), [self.booking])
+        self.assertEqual(len(self.client.get(url, {'q': 'lient'}).context['cl'].result_list), 0)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        cls.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        cls.start = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(10)))
+        for i, service in enumerate(['portrait', 'wedding', 'portrait']):
+            Booking.objects.create(
+                user=cls.client_user, service_type=service,
+                session_datetime=cls.start + timedelta(days=i), notes='a, "quoted" note' if i == 0 else None,
+            )
+
+    async def export(self, **params):
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        response = await self.async_client.get(reverse('export_bookings'), params)
+        # Served from an async iterator, so ASGI streams it instead of buffering the whole export
+        self.assertTrue(response.is_async)
+        return response, b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_csv_export_filters_by_service(self):
+        response, body = await self.export(service='portrait')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0][:6], ['id', 'username', 'email', 'service_type', 'status', 'session_datetime'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][2], 'client@example.com')
+        self.assertEqual(rows[1][6], 'a, "quoted" note')
+
+    async def test_ndjson_export_filters_by_date(self):
+        second_day = (self.start + timedelta(days=1)).date().isoformat()
+        _response, body = await self.export(format='ndjson', start=second_day, end=second_day)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['service_type'] for row in rows], ['wedding'])
+        self.assertEqual((rows[0]['username'], rows[0]['email']), ('client', 'client@example.com'))
+
+    def test_bad_filters_and_non_staff_are_rejected(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('export_bookings'), {'status': 'maybe'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_bookings'), {'format': 'xml'}).status_code, 400)
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(reverse('export_bookings')).status_code, 302)
+
+    def test_command_streams_the_same_rows(self):
+        out = io.StringIO()
+        call_command('export_bookings', format='ndjson', service='wedding', stdout=out)
+        self.assertEqual([json.loads(line)['service_type'] for line in out.getvalue().splitlines()], ['wedding'])
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        self.client_user = User.objects.create_user('client', 'client@example.com', 'pw')
+        self.csv = (
+            'username,service_type,session_datetime,status,notes\n'
+            'client,portrait,2030-01-02 10:00,,First\n'
+            'client,Wedding Photoshoot,2030-01-03T11:30,Approved,\n'
+            'nobody,portrait,2030-01-04 10:00,,\n'
+            'client,drone,2030-01-05 10:00,,\n'
+            'client,event,tomorrow,,\n'
+        )
+
+    def test_command_imports_valid_rows_and_reports_rejects(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, report = Path(tmp) / 'old.csv', Path(tmp) / 'rejects.csv'
+            source.write_text(self.csv)
+            out = io.StringIO()
+            call_command('import_bookings', str(source), batch=2, rejects=str(report), stdout=out)
+            rejects = list(csv.DictReader(report.open()))
+
+        summary = json.loads(out.getvalue())
+        self.assertEqual((summary['imported'], summary['rejected']), (2, 3))
+        self.assertEqual(
+            list(Booking.objects.order_by('session_datetime').values_list('service_type', 'status', 'notes')),
+            [('portrait', 'pending', 'First'), ('wedding', 'approved', None)],
+        )
+        self.assertEqual(sorted(int(row['line']) for row in rejects), [4, 5, 6])
+        self.assertEqual(booking_counts(self.client_user), aggregate_booking_counts(self.client_user))
+        self.assertEqual(booking_counts(), aggregate_booking_counts())
+
+    def test_upload_ndjson_dry_run_writes_nothing(self):
+        lines = [
+            json.dumps({'username': 'client', 'service_type': 'product', 'session_datetime': '2030-02-01 09:00'}),
+            'not json',
+        ]
+        upload = SimpleUploadedFile('old.ndjson', '\n'.join(lines).encode())
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('import_bookings'), {'file': upload, 'dry_run': '1'})
+        self.assertEqual(response.context['summary'], {'imported': 1, 'rejected': 1})
+        self.assertEqual(response.context['rejects'][0]['line'], 2)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_upload_is_staff_only(self):
+        self.client.force_login(self.client_user)
+        self.assertEqual(self.client.get(reverse('import_bookings')).status_code, 302)
+
+    def test_non_utf8_upload_is_rejected_whole(self):
+        upload = SimpleUploadedFile('old.csv', self.csv.replace('First', 'Café').encode('latin-1'))
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('import_bookings'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Line 2 is not valid UTF-8')
+        self.assertFalse(Booking.objects.exists())
+
+    def test_malformed_csv_rows_are_rejected_individually(self):
+        oversized = 'client,event,2030-01-06 10:00,,' + 'x' * (csv.field_size_limit() + 1) + '\n'
+        upload = SimpleUploadedFile('old.csv', (self.csv + oversized + 'client,event,2030-01-07 10:00,,\n').encode())
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('import_bookings'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary'], {'imported': 3, 'rejected': 4})
+        self.assertIn('Malformed CSV', ' '.join(reject['error'] for reject in response.context['rejects']))
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pw')
+        now = timezone.now()
+        self.old = Booking.objects.create(user=self.user, service_type='portrait', session_datetime=now - timedelta(days=400))
+        self.recent = Booking.objects.create(user=self.user, service_type='event', session_datetime=now - timedelta(days=10))
+        self.closed = Booking.objects.create(
+            user=self.user, service_type='wedding', session_datetime=now + timedelta(days=60), status='cancelled',
+        )
+        Booking.objects.filter(pk=self.closed.pk).update(updated_at=now - timedelta(days=45))
+        self.upcoming = Booking.objects.create(user=self.user, service_type='product', session_datetime=now + timedelta(days=5))
+        self.notification = Notification.objects.notify(self.old, 'approved')
+
+    def test_moves_old_and_closed_bookings_in_batches(self):
+        out = io.StringIO()
+        call_command('archive_bookings', batch=1, stdout=out)
+        self.assertEqual(json.loads(out.getvalue()), {'archived': 2})
+
+        self.assertEqual(set(Booking.objects.values_list('pk', flat=True)), {self.recent.pk, self.upcoming.pk})
+        self.assertEqual(
+            dict(ArchivedBooking.objects.values_list('pk', 'status')),
+            {self.old.pk: 'pending', self.closed.pk: 'cancelled'},
+        )
+        self.notification.refresh_from_db()
+        self.assertIsNone(self.notification.booking_id)
+        self.assertEqual(booking_counts(self.user), aggregate_booking_counts(self.user))
+        self.assertEqual(booking_counts(), aggregate_booking_counts())
+
+    def test_a_batch_costs_the_same_queries_at_any_size(self):
+        long_ago = timezone.now() - timedelta(days=500)
+        for i in range(50):
+            Booking.objects.create(user=self.user, service_type='event', session_datetime=long_ago + timedelta(hours=i))
+        version = get_versions()['bookings']
+        # Savepoint, lock and read, copy, two counter UPDATEs (studio and client),
+        # collect, detach notifications, delete, release: none of it per row
+        with self.assertNumQueries(9), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_bookings(), 52)
+        self.assertNotEqual(get_versions()['bookings'], version)
+        self.assertEqual(booking_counts(self.user), aggregate_booking_counts(self.user))
+        self.assertEqual(booking_counts(), aggregate_booking_counts())
+
+    def test_dry_run_and_keep_closed(self):
+        out = io.StringIO()
+        call_command('archive_bookings', dry_run=True, keep_closed=True, stdout=out)
+        self.assertEqual(json.loads(out.getvalue()), {'archivable': 1})
+        self.assertFalse(ArchivedBooking.objects.exists())
+
+    def test_history_is_only_read_when_asked_for(self):
+        call_command('archive_bookings', stdout=io.StringIO())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(len(response.context['bookings']), 2)
+        self.assertEqual(response.context['history'], [])
+        response = self.client.get(reverse('my_bookings'), {'history': '1'})
+        self.assertEqual({booking.pk for booking in response.context['history']}, {self.old.pk, self.closed.pk})
+
+        out = io.StringIO()
+        call_command('export_bookings', format='ndjson', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+        out = io.StringIO()
+        call_command('export_bookings', format='ndjson', include_history=True, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+    def test_dashboard_table_includes_history_when_asked(self):
+        call_command('archive_bookings', stdout=io.StringIO())
+        self.client.force_login(User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True))
+        panel = reverse('admin_dashboard_panel', args=['bookings'])
+        response = self.client.get(panel)
+        self.assertEqual({b.pk for b in response.context['booking_page']['object_list']}, {self.recent.pk, self.upcoming.pk})
+        response = self.client.get(panel, {'history': '1'})
+        self.assertEqual({b.pk for b in response.context['booking_page']['object_list']}, {self.old.pk, self.closed.pk})
+        self.assertNotContains(response, reverse('admin_update_booking', args=[self.old.pk]))
+
+    async def test_calendar_feed_includes_history_when_asked(self):
+        await sync_to_async(call_command)('archive_bookings', stdout=io.StringIO())
+        admin = await User.objects.acreate(username='admin', is_staff=True)
+        await sync_to_async(self.async_client.force_login)(admin)
+        now = timezone.now()
+        window = {'start': (now - timedelta(days=30)).isoformat(), 'end': (now + timedelta(days=70)).isoformat()}
+
+        async def events(params):
+            response = await self.async_client.get(reverse('calendar_feed'), params)
+            return response, json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+
+        live, live_events = await events(window)
+        self.assertEqual({event['id'] for event in live_events}, {self.recent.pk, self.upcoming.pk})
+        history, history_events = await events({**window, 'history': '1'})
+        self.assertEqual({event['id'] for event in history_events}, {self.recent.pk, self.upcoming.pk, self.closed.pk})
+        archived = next(event for event in history_events if event['id'] == self.closed.pk)
+        self.assertEqual((archived['editUrl'], archived['classNames']), (None, ['event-archived']))
+        self.assertNotEqual(live['ETag'], history['ETag'])
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def test_status_change_emails_client_from_worker(self):
+        user = User.objects.create_user('client', 'client@example.com', 'pw')
+        booking = Booking.objects.create(user=user, service_type='event', session_datetime=timezone.now() + timedelta(days=1))
+        Booking.objects.filter(pk=booking.pk).set_status('approved', event='approved')
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['client@example.com'])
+        self.assertEqual(Job.objects.get().status, 'done')
+
+    def test_worker_refuses_a_private_sqlite_database(self):
+        Job.objects.enqueue('unknown-job')
+        with self.assertRaisesMessage(CommandError, 'DATABASE_URL'):
+            call_command('run_workers', once=True)
+        out = io.StringIO()
+        call_command('run_workers', once=True, allow_sqlite=True, stdout=out)
+        self.assertIn('Processed 1 jobs', out.getvalue())
+
+    def test_worker_processes_get_the_parent_options(self):
+        with mock.patch('bookings.management.commands.run_workers.subprocess.Popen') as popen, \
+                mock.patch('bookings.management.commands.run_workers.signal.signal'):
+            call_command('run_workers', processes=2, threads=3, batch=5, poll=0.5, allow_sqlite=True, verbosity=2)
+        self.assertEqual(popen.call_count, 2)
+        argv = popen.call_args.args[0]
+        self.assertEqual(argv[2:], [
+            'run_workers', '--threads', '3', '--batch', '5', '--poll', '0.5', '--verbosity', '2', '--allow-sqlite',
+        ])
+
+    def test_jobs_whose_worker_keeps_dying_are_failed(self):
+        @handler('crashy')
+        def crashy():
+            self.calls.append(1)
+
+        job = Job.objects.enqueue('crashy')
+        stale = timezone.now() - LEASE - timedelta(seconds=1)
+        # Claimed twice by workers that died mid-job; one attempt left
+        Job.objects.filter(pk=job.pk).update(status='running', locked_at=stale, attempts=job.max_attempts - 1)
+        self.assertEqual([j.pk for j in claim()], [job.pk])
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+
+        # That worker died too: no more attempts
+        self.assertEqual(claim(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('lease', job.last_error)
+        self.assertEqual(self.calls, [])
+
+    def test_failures_retry_with_backoff_then_give_up(self):
+        @handler('flaky')
+        def flaky():
+            self.calls.append(1)
+            raise RuntimeError('SMTP down')
+
+        job = Job.objects.enqueue('flaky')
+        job.max_attempts = 2
+        job.save()
+
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('SMTP down', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, len(self.calls)), ('failed', 2, 2))
 
-# Create your tests here.
+    def test_backoff_grows_and_is_capped(self):
+        self.assertLess(backoff(1), backoff(4))
+        self.assertLessEqual(backoff(30), timedelta(hours=1.2))
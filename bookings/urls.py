@@ -10,12 +10,17 @@ urlpatterns = [
     path('delete/<int:pk>/', views.delete_booking, name='delete_booking'),
     path('booking/<int:pk>/cancel/', views.cancel_booking, name='cancel_booking'),
     path('details/<int:pk>/', views.booking_details, name='booking_details'),
+    path('availability/', views.availability, name='booking_availability'),
 
     # Admin
     path('admin-update/<int:pk>/', views.admin_update_booking, name='admin_update_booking'),
     path('approve/<int:pk>/', views.approve_booking, name='approve_booking'),
     path('disapprove/<int:pk>/', views.disapprove_booking, name='disapprove_booking'),
     path('reschedule/<int:pk>/', views.reschedule_booking, name='reschedule_booking'),
+    path('moderate/', views.bulk_moderate_bookings, name='bulk_moderate_bookings'),
+    path('import/', views.import_bookings, name='import_bookings'),
+    path('export/', views.export_bookings, name='export_bookings'),
+    path('calendar-feed/', views.calendar_feed, name='calendar_feed'),
     path('admin-dashboard/delete/<int:booking_id>/', admin_delete_booking, name='admin_delete_booking'),
 
 ]
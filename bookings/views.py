@@ -1,9 +1,33 @@
+import io
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.utils.dateparse import parse_date
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, url_has_allowed_host_and_scheme
+from django.utils import timezone
+from .imports import (
+    COLUMNS as IMPORT_COLUMNS, READERS as IMPORT_READERS, check_encoding as check_import_encoding, guess_format,
+    import_bookings as run_import,
+)
+from .exports import FORMATS as EXPORT_FORMATS, parse_filters as parse_export_filters, astream_export
+from .availability import MAX_RANGE_DAYS, SERVICE_DURATIONS, free_slots, save_if_available
+from .feeds import (
+    MAX_WINDOW_DAYS, astream_events, awindow_version, calendar_etag, calendar_last_modified, parse_window_bound,
+    wants_history,
+)
 from .forms import BookingForm
-from .models import Booking
+from .models import ArchivedBooking, Booking, Notification
+from photography_studio.asyncviews import aget_object_or_404, async_login_required, async_staff_member_required
+from .moderation import ACTIONS as MODERATION_ACTIONS, MAX_BATCH, MAX_SHIFT_DAYS, moderate_bookings
 
 
 # --------------------
@@ -17,8 +41,12 @@ def create_booking(request):
             booking = form.save(commit=False)
             booking.user = request.user
             booking.notified = False
-            booking.save()
-            return redirect('my_bookings')
+            try:
+                save_if_available(booking)
+            except ValidationError as error:
+                form.add_error('session_datetime', error)
+            else:
+                return redirect('my_bookings')
     else:
         form = BookingForm()
 
@@ -28,26 +56,27 @@ def create_booking(request):
 # --------------------
 # USER — VIEW BOOKINGS
 # --------------------
-@login_required
-def my_bookings(request):
-    # Show the logged-in user's bookings
-    bookings = Booking.objects.filter(user=request.user).order_by('-session_datetime')
-
-    # Notifications only for the user (admins get same notifications if they create bookings)
-    for booking in bookings.filter(status='approved', notified=False):
-        messages.info(
-            request,
-            f"Your booking for {booking.get_service_type_display()} on "
-            f"{booking.session_datetime.strftime('%Y-%m-%d %H:%M')} is now APPROVED."
-        )
-        booking.notified = True
-        booking.save()
-
-    for booking in bookings.filter(status='disapproved', notified=False):
-        booking.notified = True
-        booking.save()
-
-    return render(request, 'bookings/my_bookings.html', {'bookings': bookings})
+@async_login_required
+async def my_bookings(request):
+    # Status changes queue messages in the outbox; delivering them is one bulk UPDATE
+    # (in a transaction, which the async ORM cannot open itself)
+    for message in await sync_to_async(Notification.objects.deliver)(request.user):
+        messages.info(request, message)
+
+    # Show the logged-in user's bookings; rendering must not hit the database again
+    bookings = [
+        booking async for booking in Booking.objects.filter(user=request.user).order_by('-session_datetime')
+    ]
+    # Archived sessions only when asked for, so the default page reads the hot table alone
+    show_history = request.GET.get('history') == '1'
+    history = [
+        booking async for booking in ArchivedBooking.objects.filter(user=request.user).order_by('-session_datetime')
+    ] if show_history else []
+    return render(request, 'bookings/my_bookings.html', {
+        'bookings': bookings,
+        'show_history': show_history,
+        'history': history,
+    })
 
 
 
@@ -61,9 +90,13 @@ def update_booking(request, pk):
     if request.method == 'POST':
         form = BookingForm(request.POST, instance=booking)
         if form.is_valid():
-            form.save()
-            messages.info(request, 'Booking updated successfully.')
-            return redirect('my_bookings')
+            try:
+                save_if_available(form.save(commit=False))
+            except ValidationError as error:
+                form.add_error('session_datetime', error)
+            else:
+                messages.info(request, 'Booking updated successfully.')
+                return redirect('my_bookings')
     else:
         form = BookingForm(instance=booking)
 
@@ -78,8 +111,8 @@ def cancel_booking(request, pk):
     booking = get_object_or_404(Booking, pk=pk, user=request.user)
 
     # User can always cancel any booking except already cancelled
-    if booking.status != 'cancelled':
-        booking.status = 'cancelled'
+    if booking.status != Booking.Status.CANCELLED:
+        booking.status = Booking.Status.CANCELLED
         booking.notified = False
         booking.save()
         messages.info(request, "Your booking has been cancelled.")
@@ -99,7 +132,7 @@ def delete_booking(request, pk):
         messages.info(request, "Booking deleted successfully.")
         return redirect('admin_dashboard')
 
-    if booking.user == request.user:  # User delete
+    if booking.user_id == request.user.id:  # User delete
         booking.delete()
         messages.info(request, "Booking removed successfully.")
         return redirect('my_bookings')
@@ -110,9 +143,9 @@ def delete_booking(request, pk):
 # --------------------
 # DETAILS VIEW
 # --------------------
-@login_required
-def booking_details(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, user=request.user)
+@async_login_required
+async def booking_details(request, pk):
+    booking = await aget_object_or_404(Booking.objects.all(), pk=pk, user=request.user)
     return render(request, 'bookings/booking_details.html', {'booking': booking})
 
 
@@ -126,9 +159,13 @@ def admin_update_booking(request, pk):
     if request.method == 'POST':
         form = BookingForm(request.POST, instance=booking)
         if form.is_valid():
-            form.save()
-            messages.info(request, f"{booking.user.username}'s booking updated.")
-            return redirect('admin_dashboard')
+            try:
+                save_if_available(form.save(commit=False))
+            except ValidationError as error:
+                form.add_error('session_datetime', error)
+            else:
+                messages.info(request, f"{booking.username}'s booking updated.")
+                return redirect('admin_dashboard')
     else:
         form = BookingForm(instance=booking)
 
@@ -145,9 +182,13 @@ def admin_update_booking(request, pk):
 @staff_member_required
 def approve_booking(request, pk):
     booking = get_object_or_404(Booking, pk=pk)
-    booking.status = 'approved'
-    booking.notified = False
-    booking.save()
+    # Already approved: nothing to save and no second message for the client
+    if booking.status != Booking.Status.APPROVED:
+        booking.status = Booking.Status.APPROVED
+        booking.notified = False
+        with transaction.atomic():
+            booking.save()
+            Notification.objects.notify(booking, 'approved')
     return redirect('admin_dashboard')
 
 
@@ -157,9 +198,13 @@ def approve_booking(request, pk):
 @staff_member_required
 def disapprove_booking(request, pk):
     booking = get_object_or_404(Booking, pk=pk)
-    booking.status = 'disapproved'
-    booking.notified = True
-    booking.save()
+    # Already disapproved: nothing to save and no second message for the client
+    if booking.status != Booking.Status.DISAPPROVED:
+        booking.status = Booking.Status.DISAPPROVED
+        booking.notified = False
+        with transaction.atomic():
+            booking.save()
+            Notification.objects.notify(booking, 'disapproved')
     return redirect('admin_dashboard')
 
 
@@ -174,11 +219,17 @@ def reschedule_booking(request, pk):
         form = BookingForm(request.POST, instance=booking)
         if form.is_valid():
             updated = form.save(commit=False)
-            updated.status = 'pending'
+            updated.status = Booking.Status.PENDING
             updated.notified = False
-            updated.save()
-            messages.info(request, f"{booking.user.username}'s booking rescheduled.")
-            return redirect('admin_dashboard')
+            try:
+                with transaction.atomic():
+                    save_if_available(updated)
+                    Notification.objects.notify(updated, 'rescheduled')
+            except ValidationError as error:
+                form.add_error('session_datetime', error)
+            else:
+                messages.info(request, f"{booking.username}'s booking rescheduled.")
+                return redirect('admin_dashboard')
     else:
         form = BookingForm(instance=booking)
 
@@ -189,6 +240,41 @@ def reschedule_booking(request, pk):
     )
 
 
+# --------------------
+# ADMIN — BULK MODERATION
+# --------------------
+@staff_member_required
+@require_POST
+def bulk_moderate_bookings(request):
+    action = request.POST.get('action')
+    booking_ids = [pk for pk in request.POST.getlist('booking_ids') if pk.isdigit()]
+    try:
+        shift_days = int(request.POST.get('shift_days') or 0)
+    except ValueError:
+        shift_days = None
+
+    if action not in MODERATION_ACTIONS or not booking_ids:
+        messages.error(request, "Select at least one booking and an action.")
+    elif len(booking_ids) > MAX_BATCH:
+        messages.error(request, f"At most {MAX_BATCH} bookings can be changed at once.")
+    elif action == 'reschedule' and (not shift_days or abs(shift_days) > MAX_SHIFT_DAYS):
+        messages.error(request, f"Move rescheduled sessions by 1 to {MAX_SHIFT_DAYS} days (negative moves earlier).")
+    else:
+        shift = timedelta(days=shift_days) if action == 'reschedule' else timedelta(0)
+        try:
+            changed = moderate_bookings(booking_ids, action, shift)
+        except ValidationError as error:
+            messages.error(request, "Nothing was changed: " + "; ".join(error.messages))
+        else:
+            messages.success(request, f"{changed} booking(s) {MODERATION_ACTIONS[action][2]}.")
+
+    # Back to the same filtered page of the dashboard
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('admin_dashboard')
+
+
 # --------------------
 # ADMIN — DELETE (From Dashboard Delete Button)
 # --------------------
@@ -199,3 +285,113 @@ def admin_delete_booking(request, booking_id):
     messages.success(request, "Booking deleted.")  # ← changed from info → success
     return redirect('admin_dashboard')
 
+
+
+# --------------------
+# ADMIN — EXPORT (CSV / NDJSON download)
+# --------------------
+@async_staff_member_required
+async def export_bookings(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=400)
+    try:
+        filters = parse_export_filters(request.GET)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    # An async iterator: under ASGI a sync one would be read to the end before the first byte
+    response = StreamingHttpResponse(astream_export(export_format, **filters), content_type=content_type)
+    filename = f"bookings-{timezone.localdate().isoformat()}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# --------------------
+# ADMIN — IMPORT (CSV / NDJSON upload)
+# --------------------
+MAX_SHOWN_REJECTS = 200
+
+
+@staff_member_required
+def import_bookings(request):
+    context = {'columns': IMPORT_COLUMNS}
+    upload = request.FILES.get('file')
+    if request.method == 'POST' and upload is None:
+        messages.error(request, "Choose a CSV or NDJSON file to import.")
+    elif request.method == 'POST':
+        rejects = []
+
+        def on_reject(number, error, record):
+            if len(rejects) < MAX_SHOWN_REJECTS:
+                rejects.append({'line': number, 'error': error, 'record': record})
+
+        try:
+            check_import_encoding(upload.file)
+        except ValueError as error:
+            messages.error(request, f"File rejected: {error}")
+            return render(request, 'bookings/import_bookings.html', context)
+
+        # Decoded line by line; a large upload is spooled to disk by Django, never read whole
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        context['summary'] = run_import(
+            IMPORT_READERS[guess_format(upload.name)](lines),
+            dry_run=bool(request.POST.get('dry_run')),
+            on_reject=on_reject,
+        )
+        context['rejects'] = rejects
+        context['dry_run'] = bool(request.POST.get('dry_run'))
+    return render(request, 'bookings/import_bookings.html', context)
+
+
+# --------------------
+# AVAILABILITY (JSON)
+# --------------------
+@login_required
+def availability(request):
+    service = request.GET.get('service')
+    first_day = parse_date(request.GET.get('start', '')) or timezone.localdate()
+    last_day = parse_date(request.GET.get('end', '')) or first_day + timedelta(days=6)
+
+    if service not in SERVICE_DURATIONS:
+        return JsonResponse({'error': 'Unknown service.'}, status=400)
+    if last_day < first_day or (last_day - first_day).days >= MAX_RANGE_DAYS:
+        return JsonResponse({'error': f'Pick a range of at most {MAX_RANGE_DAYS} days.'}, status=400)
+
+    slots = free_slots(service, first_day, last_day)
+    return JsonResponse({
+        'service': service,
+        'start': first_day.isoformat(),
+        'end': last_day.isoformat(),
+        'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots],
+    })
+
+
+# --------------------
+# ADMIN — CALENDAR FEED (FullCalendar JSON)
+# --------------------
+@async_staff_member_required
+async def calendar_feed(request):
+    start = parse_window_bound(request.GET.get('start'))
+    end = parse_window_bound(request.GET.get('end'))
+
+    if not start or not end or end <= start:
+        return JsonResponse({'error': 'start and end are required.'}, status=400)
+    if (end - start).days > MAX_WINDOW_DAYS:
+        return JsonResponse({'error': f'Pick a window of at most {MAX_WINDOW_DAYS} days.'}, status=400)
+
+    # What @condition does, with the version read through the async ORM
+    await awindow_version(request)
+    etag, last_modified = quote_etag(calendar_etag(request)), calendar_last_modified(request)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = StreamingHttpResponse(
+            astream_events(start, end, wants_history(request)), content_type='application/json',
+        )
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
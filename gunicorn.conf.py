@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for the web service.
+
+By default the ASGI application runs under uvicorn workers: the async views
+(my bookings, booking details, the client dashboard and the admin calendar
+feed) then hold slow clients without tying up a worker per connection.
+Set GUNICORN_SERVER=wsgi to go back to classic sync workers.
+"""
+
+import os
+
+
+server = os.environ.get('GUNICORN_SERVER', 'asgi')
+
+if server == 'wsgi':
+    wsgi_app = 'photography_studio.wsgi:application'
+    worker_class = 'sync'
+else:
+    wsgi_app = 'photography_studio.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Settings read it to tell whether the cache is shared by every worker
+os.environ['WEB_CONCURRENCY'] = str(workers)
+timeout = 30
+# Stagger restarts so workers do not all recycle at once
+max_requests = 2000
+max_requests_jitter = 200
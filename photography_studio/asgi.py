@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'photography_studio.settings')
+# Async and sync views alike run their ORM calls on a thread per request, so
+# a persistent connection would never be reused, only left open until that
+# thread is collected. Connections close at the end of each request instead.
+# In production they go through PgBouncer in session mode (render.yaml:
+# DATABASE_POOLER, DATABASE_POOLER_HOST), which keeps the server connections
+# open: a request pays for a local connect to the pooler, not a PostgreSQL
+# login. Without a pooler every request opens its own PostgreSQL connection.
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
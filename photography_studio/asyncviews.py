@@ -0,0 +1,55 @@
+"""
+Helpers for async views on Django 4.2.
+
+The stock login_required / staff_member_required decorators wrap views in a
+sync function, and request.user is loaded lazily from the database, which is
+not allowed from async code. These decorators resolve the user (and with it
+the session) in a worker thread once, up front, so the view, its template and
+the messages framework can read them without touching the database again.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import resolve_url
+
+
+def _load_user(request):
+    user = request.user
+    user.is_authenticated  # force the lazy object while we are allowed to query
+    return user
+
+
+async def aget_user(request):
+    return await sync_to_async(_load_user)(request)
+
+
+def async_login_required(view_func):
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def async_staff_member_required(view_func):
+    """Like staff_member_required: anyone else is sent to the admin login page."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not (user.is_active and user.is_staff):
+            return redirect_to_login(request.get_full_path(), resolve_url('admin:login'))
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+async def aget_object_or_404(queryset, **lookup):
+    """Async get_object_or_404 (Django 4.2 only ships the sync one)."""
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
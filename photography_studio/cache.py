@@ -0,0 +1,160 @@
+"""
+Cache configuration and version-counter invalidation.
+
+settings.py builds CACHES from the CACHE_URL environment variable. Cached
+pages and template fragments include a version number in their key; writes
+bump the version of the data they touched (see the post_save/post_delete
+receivers in accounts.models and bookings.models), so stale entries are never
+read again and simply age out.
+"""
+
+import os
+import time
+from functools import wraps
+from urllib.parse import urlencode, urlparse
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.http import HttpResponse
+
+
+VERSION_KEYS = ('bookings', 'users')
+PAGE_TIMEOUT = 60 * 60
+FRAGMENT_TIMEOUT = 60 * 60
+
+
+# --------------------
+# SETTINGS
+# --------------------
+def cache_from_env(default_location):
+    """
+    Return the 'default' CACHES entry for CACHE_URL.
+
+    locmem:// (default), file:///var/tmp/django_cache, redis://host:6379/0
+    (any Redis-compatible server, e.g. Valkey or KeyDB).
+    """
+    url = os.environ.get('CACHE_URL', '').strip()
+    parsed = urlparse(url)
+    if not url or parsed.scheme == 'locmem':
+        return {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': parsed.netloc or default_location,
+        }
+    if parsed.scheme == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': parsed.path,
+        }
+    if parsed.scheme in ('redis', 'rediss'):
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': url,
+        }
+    raise ValueError(f"Unsupported CACHE_URL scheme: {parsed.scheme!r}")
+
+
+# Backends whose entries live inside one process
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def cache_is_shared(config, workers):
+    """
+    True when every process serving requests reads and writes the same cache.
+
+    A local-memory cache qualifies only while a single process serves the site
+    (runserver, tests, WEB_CONCURRENCY=1): with several workers an entry
+    deleted by one of them lives on in the others.
+    """
+    return workers <= 1 or config['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def require_shared_cache(config, workers, feature):
+    """Refuse to start when `feature` needs a cache that is not shared between the workers."""
+    if not cache_is_shared(config, workers):
+        raise ImproperlyConfigured(
+            f"{feature} needs a cache shared by all {workers} web workers; "
+            "set CACHE_URL (e.g. redis://host:6379/0) or WEB_CONCURRENCY=1."
+        )
+
+
+# --------------------
+# VERSION COUNTERS
+# --------------------
+def _version_key(name):
+    return f'studio:version:{name}'
+
+
+def _fresh_version():
+    # Not 0: a counter that restarted after an eviction would climb back through
+    # numbers that old fragments are still cached under
+    return time.time_ns()
+
+
+def get_versions():
+    """Current version of every counter, e.g. {'bookings': 1718000000000000012, 'users': ...}."""
+    keys = {name: _version_key(name) for name in VERSION_KEYS}
+    found = cache.get_many(list(keys.values()))
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _fresh_version(), timeout=None)
+        found.update(cache.get_many(missing))
+    return {name: found.get(key, 0) for name, key in keys.items()}
+
+
+def bump_version(name):
+    """Invalidate everything keyed on `name` once the current transaction commits."""
+    def bump():
+        key = _version_key(name)
+        if cache.add(key, _fresh_version(), timeout=None):
+            return
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, _fresh_version(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+# --------------------
+# ANONYMOUS PAGE CACHE
+# --------------------
+def _has_pending_messages(request):
+    # Flash messages are per-visitor; a page carrying one must not be shared
+    return 'messages' in request.COOKIES or '_messages' in getattr(request, 'session', {})
+
+
+def cache_anonymous_page(*version_names, timeout=PAGE_TIMEOUT, params=()):
+    """
+    Serve a rendered page from the cache to anonymous GET requests.
+
+    The key includes the named version counters, so a write that bumps one of
+    them makes the next request render afresh. Only the query parameters named
+    in `params` are part of the key: anything else (tracking tags, cache
+    busters) must not fill the cache with copies of the same page.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated or _has_pending_messages(request):
+                return view_func(request, *args, **kwargs)
+
+            versions = get_versions()
+            key = 'studio:page:{}?{}:{}'.format(
+                request.path,
+                urlencode(sorted((name, request.GET.get(name, '')) for name in params if name in request.GET)),
+                ':'.join(str(versions[name]) for name in version_names),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,81 @@
+"""
+Database configuration helpers.
+
+settings.py builds DATABASES from the DATABASE_URL environment variable and
+falls back to the bundled SQLite file; SQLite connections are tuned through
+the connection_created signal (see BookingsConfig.ready).
+"""
+
+import os
+from urllib.parse import parse_qsl, unquote, urlparse
+
+
+POSTGRES_SCHEMES = ('postgres', 'postgresql', 'pgsql')
+
+
+def database_from_env(sqlite_path):
+    """Return the 'default' DATABASES entry for the current environment."""
+    url = os.environ.get('DATABASE_URL', '').strip()
+    if not url or url.startswith('sqlite'):
+        return sqlite_config(url, sqlite_path)
+
+    parsed = urlparse(url)
+    if parsed.scheme not in POSTGRES_SCHEMES:
+        raise ValueError(f"Unsupported DATABASE_URL scheme: {parsed.scheme!r}")
+    return postgres_config(parsed)
+
+
+def sqlite_config(url, sqlite_path):
+    # sqlite:////absolute/path.db or sqlite:///relative.db
+    name = urlparse(url).path[1:] if url else ''
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name or sqlite_path,
+        'OPTIONS': {
+            'timeout': 20,  # wait up to 20 seconds for locks to clear
+        },
+    }
+
+
+def postgres_config(parsed):
+    options = dict(parse_qsl(parsed.query))
+    pooler = os.environ.get('DATABASE_POOLER', '').lower()
+    # host:port of a pooler in front of the DATABASE_URL server, same credentials
+    pooler_host = os.environ.get('DATABASE_POOLER_HOST', '').strip()
+    host, port = parsed.hostname or '', str(parsed.port or '')
+    if pooler_host:
+        host, _, port = pooler_host.partition(':')
+
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parsed.path[1:]),
+        'USER': unquote(parsed.username or ''),
+        'PASSWORD': unquote(parsed.password or ''),
+        'HOST': host,
+        'PORT': port,
+        'OPTIONS': options,
+        # Reuse connections across requests instead of reconnecting every time.
+        # Under ASGI each request runs its queries on a thread of its own, so a
+        # persistent connection is never reused; asgi.py sets 0 there and the
+        # pooler keeps the server connections open instead.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if pooler in ('pgbouncer', 'transaction'):
+        # Transaction pooling hands each transaction a different server connection,
+        # which breaks named server-side cursors used by .iterator()
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    # 'session' pooling keeps one server connection for the whole client connection
+    # (one request under ASGI), so server-side cursors keep working
+    return config
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    from django.conf import settings
+
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
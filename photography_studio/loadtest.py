@@ -0,0 +1,244 @@
+"""
+Synthetic studio data and an in-process benchmark harness.
+
+`manage.py seed_studio` bulk-inserts realistic users, profiles and bookings.
+`manage.py bench_studio` seeds a throwaway test database the same way, then
+drives the real URL routes through the Django test client and reports
+throughput, latency percentiles and query counts per scenario as JSON, so
+changes can be compared against a recorded baseline.
+"""
+
+import random
+import statistics
+import time as clock
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from bookings.models import Booking
+from bookings.stats import rebuild_booking_stats
+from photography_studio.cache import VERSION_KEYS, bump_version
+
+
+SEED_PASSWORD = 'studio-seed-pw'
+BATCH_SIZE = 1000
+
+FIRST_NAMES = ['aiko', 'ben', 'carla', 'dmitri', 'elena', 'farah', 'gio', 'hana', 'ivan', 'jun',
+               'kira', 'liam', 'mika', 'nora', 'omar', 'pia', 'quinn', 'rina', 'sam', 'tomo']
+LAST_NAMES = ['abe', 'brooks', 'cruz', 'diaz', 'endo', 'ferrer', 'garcia', 'hayashi', 'ito', 'jensen',
+              'kato', 'lopez', 'mori', 'novak', 'ono', 'park', 'reyes', 'sato', 'tan', 'ueda']
+NOTES = ['', '', '', 'Outdoor if the weather allows.', 'Two outfit changes.', 'Bringing our dog.',
+         'Need edited photos within a week.', 'Around 80 guests expected.', 'White background please.']
+
+# Rough real-world mix of services and outcomes
+SERVICE_WEIGHTS = {'portrait': 50, 'wedding': 10, 'product': 25, 'event': 15}
+STATUS_WEIGHTS = {
+    Booking.Status.PENDING: 30,
+    Booking.Status.APPROVED: 50,
+    Booking.Status.DISAPPROVED: 10,
+    Booking.Status.CANCELLED: 10,
+}
+
+SCENARIOS = ('signup', 'login', 'create_booking', 'my_bookings', 'admin_dashboard', 'admin_bookings_panel', 'approve', 'disapprove')
+# Successful form posts and moderation links redirect; a 200 there means the form was rejected
+EXPECTED_STATUS = {'signup': 302, 'login': 302, 'create_booking': 302, 'approve': 302, 'disapprove': 302}
+
+
+# --------------------
+# SEEDING
+# --------------------
+def _session_times(rng, count, past_days=180, future_days=90):
+    today = timezone.localdate()
+    for _ in range(count):
+        day = today + timedelta(days=rng.randint(-past_days, future_days))
+        slot = time(rng.randint(9, 16), rng.choice((0, 30)))
+        yield timezone.make_aware(datetime.combine(day, slot))
+
+
+def seed_studio(users, bookings, seed=0):
+    """
+    Bulk-insert `users` clients (with profiles) and `bookings` spread across them.
+
+    bulk_create() skips save() and its signals, so profiles are inserted
+    explicitly and the booking counters are rebuilt at the end.
+    """
+    rng = random.Random(seed)
+    # Hashing is deliberately slow; every seeded client shares one hash
+    password = make_password(SEED_PASSWORD)
+    offset = (User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+
+    with transaction.atomic():
+        new_users = []
+        for i in range(offset, offset + users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            new_users.append(User(
+                username=f'{first}.{last}.{i}',
+                email=f'{first}.{last}.{i}@example.com',
+                first_name=first.title(),
+                last_name=last.title(),
+                password=password,
+            ))
+        created_users = User.objects.bulk_create(new_users, batch_size=BATCH_SIZE)
+        Profile.objects.bulk_create(
+            [Profile(user=user, avatar=rng.choice(Profile.AVATAR_CHOICES)[0]) for user in created_users],
+            batch_size=BATCH_SIZE,
+        )
+
+        count = bookings if created_users else 0
+        services, service_weights = zip(*SERVICE_WEIGHTS.items())
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        Booking.objects.bulk_create(
+            [
+                Booking(
+                    user=owner,
+                    username=owner.username,
+                    service_type=rng.choices(services, service_weights)[0],
+                    status=rng.choices(statuses, status_weights)[0],
+                    session_datetime=when,
+                    notes=rng.choice(NOTES) or None,
+                    notified=True,
+                )
+                for when, owner in ((when, rng.choice(created_users)) for when in _session_times(rng, count))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        stats = rebuild_booking_stats()
+        for name in VERSION_KEYS:
+            bump_version(name)
+
+    return {'users': len(created_users), 'bookings': count, 'stats': stats}
+
+
+# --------------------
+# BENCHMARK
+# --------------------
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, round(len(ordered) * p / 100) - 1)]
+
+
+def summarize(timings, queries, errors):
+    elapsed = sum(timings)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(statistics.median(timings) * 1000, 2),
+            'p95': round(percentile(timings, 95) * 1000, 2),
+            'p99': round(percentile(timings, 99) * 1000, 2),
+            'max': round(max(timings) * 1000, 2),
+        },
+        'queries': {
+            'p50': statistics.median(queries),
+            'max': max(queries),
+        },
+    }
+
+
+class StudioBenchmark:
+    """Each scenario method returns a callable issuing one request with its own client."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.staff = User.objects.create_user('bench-admin', password=SEED_PASSWORD, is_staff=True)
+        self.clients = list(User.objects.filter(is_staff=False).order_by('pk')[:50])
+        if not self.clients:
+            raise ValueError("Seed some users first (seed_studio).")
+        self.counter = 0
+        # New bookings go after every seeded session so availability checks always pass
+        self.next_free_day = timezone.localdate() + timedelta(days=365)
+
+    def logged_in(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def scenario_signup(self):
+        client = Client()
+
+        def request():
+            self.counter += 1
+            name = f'bench-signup-{self.counter}'
+            return client.post(reverse('signup'), {
+                'username': name,
+                'email': f'{name}@example.com',
+                'password': SEED_PASSWORD,
+                'confirm_password': SEED_PASSWORD,
+            })
+        return request
+
+    def scenario_login(self):
+        client = Client()
+
+        def request():
+            user = self.rng.choice(self.clients)
+            return client.post(reverse('login'), {'username': user.username, 'password': SEED_PASSWORD})
+        return request
+
+    def scenario_create_booking(self):
+        client = self.logged_in(self.clients[0])
+
+        def request():
+            day, self.next_free_day = self.next_free_day, self.next_free_day + timedelta(days=1)
+            return client.post(reverse('create_booking'), {
+                'service_type': 'portrait',
+                'session_datetime': f'{day.isoformat()}T10:00',
+                'notes': 'Benchmark booking',
+            })
+        return request
+
+    def scenario_my_bookings(self):
+        client = self.logged_in(self.clients[0])
+        return lambda: client.get(reverse('my_bookings'))
+
+    def scenario_admin_dashboard(self):
+        client = self.logged_in(self.staff)
+        return lambda: client.get(reverse('admin_dashboard'))
+
+    def scenario_admin_bookings_panel(self):
+        client = self.logged_in(self.staff)
+        return lambda: client.get(reverse('admin_dashboard_panel', args=['bookings']))
+
+    def _moderate(self, url_name):
+        # A fresh pending booking every round: re-moderating one already in the
+        # target state would measure a no-op rather than a real status change
+        client = self.logged_in(self.staff)
+        booking_ids = list(Booking.objects.filter(status=Booking.Status.PENDING).values_list('pk', flat=True)[:1000])
+        self.rng.shuffle(booking_ids)
+
+        def request():
+            if not booking_ids:
+                raise ValueError("Ran out of pending bookings; seed more or run fewer iterations.")
+            return client.get(reverse(url_name, args=[booking_ids.pop()]))
+        return request
+
+    def scenario_approve(self):
+        return self._moderate('approve_booking')
+
+    def scenario_disapprove(self):
+        return self._moderate('disapprove_booking')
+
+    def run(self, scenarios=SCENARIOS, iterations=50):
+        results = {}
+        for name in scenarios:
+            request = getattr(self, f'scenario_{name}')()
+            timings, queries, errors = [], [], 0
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    started = clock.perf_counter()
+                    response = request()
+                    timings.append(clock.perf_counter() - started)
+                queries.append(len(captured))
+                if response.status_code != EXPECTED_STATUS.get(name, 200):
+                    errors += 1
+            results[name] = summarize(timings, queries, errors)
+        return results
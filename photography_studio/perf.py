@@ -0,0 +1,329 @@
+"""
+Opt-in request profiling.
+
+With PERF_PROFILING enabled, PerfMiddleware records for every resolved URL
+name the wall time, the number and time of SQL queries, repeated query
+shapes (the same SQL run more than once, i.e. N+1 patterns) and template
+render time, for sync and async views alike. Values go into fixed-bucket
+histograms, so memory stays bounded and recording is a bisect plus an
+increment. Each worker periodically writes its histograms to
+PERF_SNAPSHOT_DIR; the staff perf page and `manage.py perf_report` merge
+those snapshots, dropping the ones left behind by exited workers. A reset
+deletes every snapshot and tells the running workers to start over.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+
+METRICS = ('wall_ms', 'sql_count', 'sql_ms', 'duplicate_sql', 'template_ms')
+PERCENTILES = (50, 95, 99)
+
+# Geometric bucket bounds from 0.1 to ~200,000 (ms or query counts)
+BUCKET_BOUNDS = [0.1 * 1.2 ** i for i in range(80)]
+
+# Touched by reset_snapshots(); workers clear their histograms when it is newer than their last look
+RESET_MARKER = 'reset'
+
+_current = ContextVar('perf_request', default=None)
+
+
+# --------------------
+# HISTOGRAMS
+# --------------------
+class Histogram:
+    def __init__(self, counts=None, total=0.0, maximum=0.0):
+        self.counts = counts or [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def record(self, value):
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (never above the max seen)."""
+        count = self.count
+        if not count:
+            return 0.0
+        rank, seen = count * p / 100, 0
+        for i, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        count = self.count
+        data = {f'p{p}': round(self.percentile(p), 2) for p in PERCENTILES}
+        data.update(mean=round(self.total / count, 2) if count else 0.0, max=round(self.maximum, 2))
+        return data
+
+    def to_json(self):
+        return {'counts': self.counts, 'total': self.total, 'maximum': self.maximum}
+
+
+class Registry:
+    """Histograms per URL name for this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.duplicates = {}   # url name -> last repeated SQL seen
+        self.last_flush = time.monotonic()
+        self.reset_seen = time.time()
+
+    def record(self, name, sample, duplicate_sql=None):
+        with self.lock:
+            metrics = self.views.setdefault(name, {metric: Histogram() for metric in METRICS})
+            for metric, value in sample.items():
+                metrics[metric].record(value)
+            if duplicate_sql:
+                self.duplicates[name] = duplicate_sql
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+            self.duplicates.clear()
+            self.reset_seen = time.time()
+
+    def to_json(self):
+        with self.lock:
+            return {
+                'views': {
+                    name: {metric: hist.to_json() for metric, hist in metrics.items()}
+                    for name, metrics in self.views.items()
+                },
+                'duplicates': dict(self.duplicates),
+            }
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= settings.PERF_FLUSH_SECONDS
+
+    def flush(self, force=False):
+        """Write this worker's snapshot if the flush interval has passed."""
+        if not force and not self.flush_due():
+            return
+        self.last_flush = time.monotonic()
+        directory = Path(settings.PERF_SNAPSHOT_DIR)
+        try:
+            reset_at = (directory / RESET_MARKER).stat().st_mtime
+        except OSError:
+            reset_at = 0
+        if reset_at > self.reset_seen:
+            self.clear()
+        if not self.views:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f'{os.getpid()}.json'
+        tmp = target.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.to_json()))
+        tmp.replace(target)
+
+
+registry = Registry()
+
+
+def _process_exited(pid):
+    if os.name != 'posix':
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, OverflowError):
+        return False
+    return False
+
+
+def collect_report():
+    """Merge every worker snapshot into one row per URL name, slowest p95 first."""
+    # Only a process that served requests has anything to add (not manage.py perf_report)
+    if registry.views:
+        registry.flush(force=True)
+    merged, duplicates = {}, {}
+    for path in sorted(Path(settings.PERF_SNAPSHOT_DIR).glob('*.json')):
+        if path.stem.isdigit() and _process_exited(int(path.stem)):
+            path.unlink(missing_ok=True)   # a restarted or retired worker
+            continue
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        duplicates.update(snapshot.get('duplicates', {}))
+        for name, metrics in snapshot.get('views', {}).items():
+            target = merged.setdefault(name, {metric: Histogram() for metric in METRICS})
+            for metric, data in metrics.items():
+                target[metric].merge(Histogram(data['counts'], data['total'], data['maximum']))
+
+    report = []
+    for name, metrics in merged.items():
+        report.append({
+            'view': name,
+            'requests': metrics['wall_ms'].count,
+            **{metric: hist.summary() for metric, hist in metrics.items()},
+            'duplicate_example': duplicates.get(name, ''),
+        })
+    report.sort(key=lambda row: row['wall_ms']['p95'], reverse=True)
+    return report
+
+
+def reset_snapshots():
+    """Delete every snapshot and start this worker over; the others follow on their next flush."""
+    directory = Path(settings.PERF_SNAPSHOT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob('*.json'):
+        path.unlink(missing_ok=True)
+    (directory / RESET_MARKER).touch()
+    registry.clear()
+
+
+# --------------------
+# COLLECTION
+# --------------------
+class _RequestStats:
+    __slots__ = ('sql_count', 'sql_ms', 'statements', 'template_ms')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.statements = Counter()
+        self.template_ms = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection while profiling is on.
+
+    Connections are per thread, and an async view's queries run on
+    sync_to_async threads, so the wrapper stays on the connection and finds
+    the request through the context variable, which those threads inherit.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_ms += (time.perf_counter() - started) * 1000
+        stats.sql_count += 1
+        stats.statements[sql] += 1
+
+
+def _install_query_timer(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _time_thread_connections():
+    # Connections opened later are covered by the connection_created receiver
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection)
+
+
+class PerfMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_query_timer, dispatch_uid='perf-query-timer')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _time_thread_connections()
+        stats = _RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, stats, started)
+        registry.flush()
+        return response
+
+    async def __acall__(self, request):
+        # The ORM runs on the thread-sensitive executor, whose connections may predate this middleware
+        await sync_to_async(_time_thread_connections)()
+        stats = _RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, stats, started)
+        if registry.flush_due():
+            await sync_to_async(registry.flush, thread_sensitive=False)()
+        return response
+
+    @staticmethod
+    def record(request, stats, started):
+        wall_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        name = (match.view_name if match else None) or 'unresolved'
+        repeated = [(sql, n) for sql, n in stats.statements.items() if n > 1]
+        registry.record(name, {
+            'wall_ms': wall_ms,
+            'sql_count': stats.sql_count,
+            'sql_ms': stats.sql_ms,
+            'duplicate_sql': sum(n - 1 for _sql, n in repeated),
+            'template_ms': stats.template_ms,
+        }, duplicate_sql=max(repeated, key=lambda item: item[1])[0][:300] if repeated else None)
+
+
+# --------------------
+# TEMPLATE TIMING
+# --------------------
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report render time to PerfMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,48 @@
+"""
+Index-backed prefix search (user directory, booking admin).
+
+A prefix match must come from an index: a '%term%' LIKE reads every row.
+Matching ignores case. On PostgreSQL `field__istartswith` becomes
+`UPPER(field::text) LIKE UPPER('term%')`, which the pg_trgm GIN indexes on
+that same expression serve (accounts/migrations/0004). SQLite cannot use an
+index for that LIKE, so there the prefix becomes the range
+lower(term) <= lower(field) < next(lower(term)), which walks a lower() expression
+index. SQLite's lower() folds ASCII letters only.
+"""
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+
+def prefix_upper_bound(term):
+    """The smallest string greater than every string that starts with `term`."""
+    last = ord(term[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:
+        last = 0xE000  # surrogates cannot be stored; skip past them
+    if last > 0x10FFFF:
+        return None
+    return term[:-1] + chr(last)
+
+
+def prefix_q(field, term):
+    """Q object matching rows whose `field` starts with `term`, ignoring case."""
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{field}__istartswith': term})
+    term = term.lower()
+    upper = prefix_upper_bound(term)
+    if upper is None:
+        return Q(**{f'{field}__istartswith': term})
+    return Q(GreaterThanOrEqual(Lower(field), term)) & Q(LessThan(Lower(field), upper))
+
+
+def prefix_search(queryset, fields, term):
+    """Filter `queryset` to rows where any of `fields` starts with `term`; a blank term matches all."""
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    condition = Q()
+    for field in fields:
+        condition |= prefix_q(field, term)
+    return queryset.filter(condition)